@@ -0,0 +1,286 @@
+"""
+Covid-19 Analytics - загрузка и расчёт метрик
+Потоковое чтение больших CSV (страна/регион × день) по частям с компактными типами,
+колоночный кэш на диске (np.memmap) и векторные скользящие метрики сразу по всем регионам
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Названия колонок в исходном CSV (по умолчанию - формат Our World in Data)
+COLUMNS = {
+    'date': 'date',
+    'region': 'iso_code',
+    'population': 'population',
+}
+COUNTS = {
+    'cases': 'new_cases',
+    'deaths': 'new_deaths',
+}
+
+CHUNKSIZE = 1_000_000
+CACHE_VERSION = 1
+WINDOWS = (7, 14)
+PER_CAPITA = 100_000
+
+
+class DailyTable:
+    """
+    Длинная таблица в колонках: region (int32, код категории), day (int32, дни от 1970-01-01)
+    и счётчики (int32). regions - названия категорий, population - население по коду региона
+    """
+
+    def __init__(self, region, day, counts, regions, population):
+        self.region = region
+        self.day = day
+        self.counts = counts
+        self.regions = regions
+        self.population = population
+
+    def __len__(self):
+        return len(self.day)
+
+    def to_frame(self):
+        """DataFrame с категориальной колонкой region (для ноутбука)"""
+        frame = pd.DataFrame({
+            'region': pd.Categorical.from_codes(np.asarray(self.region), self.regions),
+            'date': np.asarray(self.day).astype('datetime64[D]'),
+        })
+        for name, values in self.counts.items():
+            frame[name] = np.asarray(values)
+        return frame
+
+
+def cache_dir_for(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), 'cache', os.path.basename(path) + '.cols')
+
+
+def _source_meta(path, columns, counts):
+    stat = os.stat(path)
+    return {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'columns': columns,
+        'counts': counts,
+    }
+
+
+def _write_cache(path, cache_dir, columns, counts, chunksize):
+    """Читает CSV по частям и дописывает колонки в бинарные файлы; возвращает meta"""
+    tmp_dir = cache_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    names = ['region', 'day'] + list(counts)
+    files = {name: open(os.path.join(tmp_dir, name + '.bin'), 'wb') for name in names}
+
+    usecols = [columns['date'], columns['region']] + list(counts.values())
+    has_population = columns.get('population') in pd.read_csv(path, nrows=0).columns
+    if has_population:
+        usecols.append(columns['population'])
+
+    dtypes = {columns['region']: str, columns['date']: str}
+    dtypes.update({source: 'float64' for source in counts.values()})
+
+    region_index = {}
+    population = np.zeros(0)
+    rows = 0
+
+    try:
+        for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+            chunk = chunk.dropna(subset=[columns['region'], columns['date']])
+            if chunk.empty:
+                continue
+
+            # Коды категорий общие для всех частей: локальные коды -> глобальные
+            local_codes, uniques = pd.factorize(chunk[columns['region']], sort=False)
+            for name in uniques:
+                if name not in region_index:
+                    region_index[name] = len(region_index)
+            mapping = np.fromiter((region_index[name] for name in uniques), dtype=np.int32, count=len(uniques))
+            codes = mapping[local_codes]
+
+            days = pd.to_datetime(chunk[columns['date']], cache=True).values.astype('datetime64[D]').astype(np.int32)
+
+            files['region'].write(codes.tobytes())
+            files['day'].write(days.tobytes())
+            for name, source in counts.items():
+                values = chunk[source].fillna(0).to_numpy()
+                files[name].write(values.astype(np.int32).tobytes())
+
+            if len(population) < len(region_index):
+                population = np.concatenate([population, np.full(len(region_index) - len(population), np.nan)])
+            if has_population:
+                latest = pd.Series(chunk[columns['population']].to_numpy()).groupby(codes).max()
+                population[latest.index] = np.fmax(population[latest.index], latest.to_numpy())
+
+            rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    np.save(os.path.join(tmp_dir, 'population.npy'), population)
+    meta = _source_meta(path, columns, counts)
+    meta.update(rows=rows, regions=list(region_index))
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    return meta
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load(path, columns=None, counts=None, cache_dir=None, chunksize=CHUNKSIZE, refresh=False):
+    """
+    Загружает CSV в DailyTable. Первая загрузка читает файл по частям и пишет колоночный кэш;
+    последующие только отображают его в память (np.memmap), пока исходный файл не изменился
+    """
+    columns = {**COLUMNS, **(columns or {})}
+    counts = dict(counts or COUNTS)
+    cache_dir = cache_dir or cache_dir_for(path)
+
+    meta = None if refresh else _read_meta(cache_dir)
+    expected = _source_meta(path, columns, counts)
+    if meta is None or any(meta.get(key) != value for key, value in expected.items()):
+        meta = _write_cache(path, cache_dir, columns, counts, chunksize)
+
+    def column(name):
+        if not meta['rows']:
+            return np.zeros(0, dtype=np.int32)
+        return np.memmap(os.path.join(cache_dir, name + '.bin'), dtype=np.int32, mode='r', shape=(meta['rows'],))
+
+    return DailyTable(
+        region=column('region'),
+        day=column('day'),
+        counts={name: column(name) for name in meta['counts']},
+        regions=meta['regions'],
+        population=np.load(os.path.join(cache_dir, 'population.npy')),
+    )
+
+
+def to_grid(table, name):
+    """
+    Матрица регионы × дни (float64) для счётчика name. Пропущенные дни - 0,
+    повторы одной пары регион/день суммируются. Возвращает (матрица, даты)
+    """
+    if not len(table):
+        return np.zeros((len(table.regions), 0)), np.array([], dtype='datetime64[D]')
+
+    day = np.asarray(table.day)
+    first, last = int(day.min()), int(day.max())
+    n_regions, n_days = len(table.regions), last - first + 1
+
+    flat = np.asarray(table.region, dtype=np.int64) * n_days + (day - first)
+    grid = np.bincount(flat, weights=np.asarray(table.counts[name]), minlength=n_regions * n_days)
+    dates = np.arange(first, last + 1).astype('datetime64[D]')
+    return grid.reshape(n_regions, n_days), dates
+
+
+def rolling_sum(grid, window):
+    """Скользящая сумма по дням (ось 1); первые window-1 дней - NaN"""
+    csum = np.cumsum(grid, axis=1)
+    result = np.full(grid.shape, np.nan)
+    if grid.shape[1] >= window:
+        result[:, window - 1] = csum[:, window - 1]
+        result[:, window:] = csum[:, window:] - csum[:, :-window]
+    return result
+
+
+def rolling_mean(grid, window):
+    return rolling_sum(grid, window) / window
+
+
+def growth_rate(grid, window):
+    """Рост суммы за последние window дней к предыдущим window дням (0.25 = +25%)"""
+    sums = rolling_sum(grid, window)
+    result = np.full(grid.shape, np.nan)
+    previous, current = sums[:, :-window], sums[:, window:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[:, window:] = np.where(previous > 0, current / previous - 1, np.nan)
+    return result
+
+
+def per_capita(grid, population, per=PER_CAPITA):
+    """Значения на per жителей; регионы без населения - NaN"""
+    population = np.where(population > 0, population, np.nan)
+    return grid / population[:, None] * per
+
+
+def compute_metrics(table, windows=WINDOWS, per=PER_CAPITA):
+    """
+    Все метрики для всех регионов разом. Возвращает (даты, {метрика: матрица регионы × дни}):
+    {счётчик}, {счётчик}_avg{w}, {счётчик}_growth{w}, {счётчик}_per100k_avg{w}
+    """
+    metrics = {}
+    dates = None
+    for name in table.counts:
+        grid, dates = to_grid(table, name)
+        metrics[name] = grid
+        for window in windows:
+            average = rolling_mean(grid, window)
+            metrics[f'{name}_avg{window}'] = average
+            metrics[f'{name}_growth{window}'] = growth_rate(grid, window)
+            metrics[f'{name}_per{per // 1000}k_avg{window}'] = per_capita(average, table.population, per)
+    return dates, metrics
+
+
+def metrics_frame(table, dates, metrics, regions=None):
+    """Длинный DataFrame (регион, дата, метрики); regions - ограничить списком названий"""
+    codes = np.arange(len(table.regions))
+    if regions is not None:
+        wanted = set(regions)
+        codes = np.array([i for i, name in enumerate(table.regions) if name in wanted], dtype=np.int64)
+
+    frame = pd.DataFrame({
+        'region': pd.Categorical.from_codes(np.repeat(codes, len(dates)), table.regions),
+        'date': np.tile(dates, len(codes)),
+    })
+    for name, grid in metrics.items():
+        frame[name] = grid[codes].ravel().astype(np.float32)
+    return frame
+
+
+def latest_snapshot(table, dates, metrics, metric, top=10):
+    """Топ регионов по метрике на последний день"""
+    values = metrics[metric][:, -1]
+    order = np.argsort(np.nan_to_num(values, nan=-np.inf))[::-1][:top]
+    return pd.DataFrame({'region': [table.regions[i] for i in order], metric: values[order]})
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Использование: python fds.py data.csv [--refresh]")
+        return
+
+    path = sys.argv[1]
+    start = time.time()
+    table = load(path, refresh='--refresh' in sys.argv)
+    loaded = time.time()
+    dates, metrics = compute_metrics(table)
+    computed = time.time()
+
+    print(f"Строк: {len(table):,}, регионов: {len(table.regions)}, дней: {len(dates)}")
+    print(f"Загрузка: {loaded - start:.2f} сек | метрики: {computed - loaded:.2f} сек")
+    if len(dates):
+        print(f"\nТоп регионов на {dates[-1]} (случаев на 100 тыс., среднее за 7 дней):")
+        print(latest_snapshot(table, dates, metrics, 'cases_per100k_avg7').to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
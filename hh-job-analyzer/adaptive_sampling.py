@@ -0,0 +1,146 @@
+"""
+HeadHunter Adaptive Sampling
+Случайная/стратифицированная выборка вакансий и остановка, когда метрики
+достигли нужной точности (доверительный интервал), вместо фиксированного max_details
+"""
+
+import math
+import random
+from collections import Counter
+
+Z_95 = 1.96
+
+
+def sample_order(vacancies, per_page=100, seed=None):
+    """
+    Перемешивает вакансии, стратифицируя по страницам поиска:
+    первые N вакансий выборки равномерно покрывают всю выдачу, а не только её верх
+    """
+    rng = random.Random(seed)
+    strata = [vacancies[i:i + per_page] for i in range(0, len(vacancies), per_page)]
+    for stratum in strata:
+        rng.shuffle(stratum)
+    rng.shuffle(strata)
+
+    ordered = []
+    for i in range(max((len(s) for s in strata), default=0)):
+        for stratum in strata:
+            if i < len(stratum):
+                ordered.append(stratum[i])
+    return ordered
+
+
+def wilson_interval(successes, n, z=Z_95):
+    """Доверительный интервал Уилсона для доли: (оценка, нижняя, верхняя)"""
+    if n == 0:
+        return 0.0, 0.0, 1.0
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return p, max(0.0, center - half), min(1.0, center + half)
+
+
+def mean_interval(n, mean, m2, z=Z_95):
+    """Доверительный интервал среднего (нормальное приближение)"""
+    if n < 2:
+        return mean, -math.inf, math.inf
+    half = z * math.sqrt(m2 / (n - 1) / n)
+    return mean, mean - half, mean + half
+
+
+class PrecisionTracker:
+    """
+    Накопитель выборочных метрик. add() возвращает True, когда все отслеживаемые
+    метрики известны с нужной точностью и дальше загружать детали не нужно.
+
+    target - допустимая полуширина интервала для долей (0.08 = ±8 п.п.)
+    coding_target - полуширина для среднего уровня кодинга (шкала 0-3)
+    gate_skills - False: доли топ-навыков только выводятся в отчёт и на остановку не влияют
+    boundaries - {метрика: границы}: метрика считается известной, как только её интервал
+        не пересекает ни одной границы (например, пороги уровней профиля в career_scoring),
+        даже если он ещё шире target
+    """
+
+    def __init__(self, target=0.08, coding_target=0.25, top_skills=5, min_samples=20, z=Z_95,
+                 gate_skills=True, boundaries=None):
+        self.target = target
+        self.coding_target = coding_target
+        self.gate_skills = gate_skills
+        self.boundaries = boundaries or {}
+        self.top_skills = top_skills
+        self.min_samples = min_samples
+        self.z = z
+
+        self.n = 0
+        self.junior = 0
+        self.hybrid = 0
+        self.tracked = set()
+        self.skills = Counter()
+        # Welford для среднего кодинга
+        self.coding_n = 0
+        self.coding_mean = 0.0
+        self.coding_m2 = 0.0
+
+    def add(self, junior=None, hybrid=None, coding=None, skills=()):
+        """Добавляет одну вакансию; None - метрика для этого анализа не считается"""
+        self.n += 1
+
+        if junior is not None:
+            self.tracked.add('junior')
+            self.junior += bool(junior)
+        if hybrid is not None:
+            self.tracked.add('hybrid')
+            self.hybrid += bool(hybrid)
+        if coding is not None:
+            self.tracked.add('coding')
+            self.coding_n += 1
+            delta = coding - self.coding_mean
+            self.coding_mean += delta / self.coding_n
+            self.coding_m2 += delta * (coding - self.coding_mean)
+
+        self.skills.update(set(skills))
+        return self.done()
+
+    def intervals(self):
+        """Текущие оценки и интервалы: {метрика: (оценка, нижняя, верхняя)}"""
+        result = {}
+        if 'junior' in self.tracked:
+            result['junior_pct'] = wilson_interval(self.junior, self.n, self.z)
+        if 'hybrid' in self.tracked:
+            result['hybrid_pct'] = wilson_interval(self.hybrid, self.n, self.z)
+        if 'coding' in self.tracked:
+            result['coding_level'] = mean_interval(self.coding_n, self.coding_mean, self.coding_m2, self.z)
+        for skill, count in self.skills.most_common(self.top_skills):
+            result[f'skill:{skill}'] = wilson_interval(count, self.n, self.z)
+        return result
+
+    def done(self):
+        if self.n < self.min_samples:
+            return False
+
+        for name, (_, low, high) in self.intervals().items():
+            if name.startswith('skill:') and not self.gate_skills:
+                continue
+            limit = self.coding_target if name == 'coding_level' else self.target
+
+            if (high - low) / 2 <= limit:
+                continue
+            # По какую сторону каждого порога лежит метрика, уже ясно
+            bounds = self.boundaries.get(name)
+            if bounds and not any(low < bound < high for bound in bounds):
+                continue
+            return False
+        return True
+
+    def report(self):
+        """Интервалы в процентах (доли) и в баллах (кодинг) для вывода и сохранения"""
+        report = {}
+        for name, (estimate, low, high) in self.intervals().items():
+            scale = 1 if name == 'coding_level' else 100
+            report[name] = {
+                'estimate': round(estimate * scale, 2),
+                'low': round(low * scale, 2),
+                'high': round(high * scale, 2),
+            }
+        return report
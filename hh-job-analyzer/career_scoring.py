@@ -0,0 +1,238 @@
+"""
+HeadHunter Career Scoring Engine
+Пакетная оценка совместимости ролей сразу для множества профилей (what-if анализ)
+"""
+
+import json
+import math
+import sys
+
+import numpy as np
+
+# Профиль INTP - те же правила, что были зашиты в calculate_intp_score.
+# Уровни (tiers) проверяются по порядку, срабатывает первый подходящий:
+#   coding - (граница, баллы): средний уровень кода < границы
+#   hybrid / seniority - (порог %, баллы): доля вакансий >= порога
+INTP_PROFILE = {
+    'name': 'INTP',
+    'base': 50,
+    'coding': [(1, 20), (2, 10), (2.5, 0), (math.inf, -10)],
+    'hybrid': [(30, 15), (15, 8)],
+    'seniority': [(30, 15), (15, 8)],
+    # None - доля junior-friendly вакансий (noExperience + between1And3),
+    # иначе список названий опыта из HH, доля которых считается
+    'experience': None,
+    'analytical_keywords': ['аналитическое мышление', 'анализ данных', 'аналитика',
+                            'системное мышление', 'исследовани'],
+    'analytical_min': 2,
+    'analytical_points': 10,
+    'salary_floor': 150000,
+    'salary_points': 5,
+}
+
+
+def make_profile(name, **overrides):
+    """Создаёт профиль на основе INTP, переопределяя нужные веса и пороги"""
+    profile = dict(INTP_PROFILE, **overrides)
+    profile['name'] = name
+    return profile
+
+
+def profile_boundaries(profile):
+    """
+    Пороги уровней профиля в шкале PrecisionTracker (доли 0-1, кодинг как есть):
+    выборку можно остановить, когда метрика уверенно по одну сторону каждого порога
+    """
+    return {
+        'junior_pct': sorted(bound / 100 for bound, _ in profile['seniority']),
+        'hybrid_pct': sorted(bound / 100 for bound, _ in profile['hybrid']),
+        'coding_level': sorted(bound for bound, _ in profile['coding'] if math.isfinite(bound)),
+    }
+
+
+def _pct(part, total):
+    return part / total * 100 if total else 0
+
+
+def role_table(results):
+    """
+    Сводит агрегаты ролей в столбцы numpy.
+    Принимает как результаты analyze_role, так и записи из hh_intp_career_analysis.json
+    """
+    names = []
+    coding = []
+    hybrid = []
+    junior = []
+    salary = []
+    skills_text = []
+    experience = []
+
+    for r in results:
+        names.append(r['role'])
+        coding.append(r.get('avg_coding_level', r.get('coding_level', 0)))
+
+        if 'analyzed' in r:
+            hybrid.append(_pct(r['hybrid_remote'], r['analyzed']))
+            junior.append(_pct(r['junior_friendly'], r['analyzed']))
+        else:
+            hybrid.append(r.get('hybrid_remote_pct', 0))
+            junior.append(r.get('junior_friendly_pct', 0))
+
+        if 'salary' in r:
+            from_vals = [s['from'] for s in r['salary'] if s.get('from')]
+            salary.append(sum(from_vals) / len(from_vals) if from_vals else np.nan)
+        else:
+            # В JSON сохраняется уже посчитанное среднее
+            avg = r.get('avg_salary_from')
+            salary.append(np.nan if avg is None else avg)
+
+        # Один текст на роль: поиск ключевого слова - одна проверка подстроки,
+        # а не перебор всех навыков
+        skills = r.get('skills', r.get('top_skills', {}))
+        skills_text.append('\n'.join(s.lower() for s in skills))
+        experience.append(dict(r.get('experience', {})))
+
+    return {
+        'role': names,
+        'coding': np.asarray(coding, dtype=np.float64),
+        'hybrid_pct': np.asarray(hybrid, dtype=np.float64),
+        'junior_pct': np.asarray(junior, dtype=np.float64),
+        'avg_salary': np.asarray(salary, dtype=np.float64),
+        'skills_text': skills_text,
+        'experience': experience,
+    }
+
+
+def _tier_points(values, profiles, key, below):
+    """
+    Баллы по уровням для всех ролей × профилей.
+    values - столбец по ролям или матрица роли × профили.
+    below=True - уровень срабатывает при value < границы, иначе при value >= порога
+    """
+    width = max((len(p[key]) for p in profiles), default=0)
+    if width == 0:
+        return np.zeros((len(values), len(profiles)))
+
+    pad = -math.inf if below else math.inf
+    bounds = np.full((len(profiles), width), pad)
+    points = np.zeros((len(profiles), width))
+    for i, profile in enumerate(profiles):
+        for j, (bound, pts) in enumerate(profile[key]):
+            bounds[i, j] = bound
+            points[i, j] = pts
+
+    # (роли, профили, уровни)
+    v = values[:, None, None] if values.ndim == 1 else values[:, :, None]
+    matched = v < bounds[None] if below else v >= bounds[None]
+    first = matched.argmax(axis=2)
+    hit = matched.any(axis=2)
+    chosen = np.take_along_axis(np.broadcast_to(points, matched.shape), first[..., None], axis=2)[..., 0]
+    return np.where(hit, chosen, 0)
+
+
+def _experience_share(table, profiles):
+    """Доля вакансий с целевым опытом для всех ролей × профилей"""
+    share = np.repeat(table['junior_pct'][:, None], len(profiles), axis=1)
+
+    targets = [i for i, p in enumerate(profiles) if p.get('experience')]
+    if not targets:
+        return share
+
+    names = sorted({name for i in targets for name in profiles[i]['experience']})
+    col = {name: k for k, name in enumerate(names)}
+
+    counts = np.array([[exp.get(name, 0) for name in names] for exp in table['experience']],
+                      dtype=np.float64).reshape(len(table['experience']), len(names))
+    totals = np.array([sum(exp.values()) for exp in table['experience']], dtype=np.float64)
+
+    mask = np.zeros((len(names), len(targets)))
+    for k, i in enumerate(targets):
+        for name in profiles[i]['experience']:
+            mask[col[name], k] = 1
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct = np.where(totals[:, None] > 0, counts @ mask / totals[:, None] * 100, 0)
+    share[:, targets] = pct
+    return share
+
+
+def _analytical_counts(table, profiles):
+    """Сколько аналитических ключевых слов профиля встречается в навыках роли"""
+    keywords = sorted({k for p in profiles for k in p['analytical_keywords']})
+    if not keywords:
+        return np.zeros((len(table['role']), len(profiles)))
+
+    # Каждое слово проверяется один раз на роль, даже если оно есть в сотне профилей
+    hits = np.array([[kw in text for kw in keywords] for text in table['skills_text']],
+                    dtype=np.float64).reshape(len(table['skills_text']), len(keywords))
+
+    col = {kw: k for k, kw in enumerate(keywords)}
+    mask = np.zeros((len(keywords), len(profiles)))
+    for i, profile in enumerate(profiles):
+        for kw in profile['analytical_keywords']:
+            mask[col[kw], i] = 1
+
+    return hits @ mask
+
+
+def score_roles(results, profiles):
+    """
+    Оценивает все роли по всем профилям за один векторный проход.
+    Возвращает матрицу баллов (роли × профили), 0-100
+    """
+    table = role_table(results)
+    column = lambda key: np.array([p[key] for p in profiles], dtype=np.float64)
+
+    score = np.broadcast_to(column('base'), (len(table['role']), len(profiles))).copy()
+    score += _tier_points(table['coding'], profiles, 'coding', below=True)
+    score += _tier_points(table['hybrid_pct'], profiles, 'hybrid', below=False)
+
+    # Уровни seniority считаются по своей доле опыта для каждого профиля
+    share = _experience_share(table, profiles)
+    score += _tier_points(share, profiles, 'seniority', below=False)
+
+    analytical = _analytical_counts(table, profiles)
+    score += np.where(analytical >= column('analytical_min'), column('analytical_points'), 0)
+
+    salary = table['avg_salary'][:, None]
+    with np.errstate(invalid='ignore'):
+        rich = ~np.isnan(salary) & (salary >= column('salary_floor'))
+    score += np.where(rich, column('salary_points'), 0)
+
+    return np.clip(score, 0, 100).astype(int)
+
+
+def rank_roles(results, profiles):
+    """Рейтинг ролей для каждого профиля: {профиль: [(роль, балл), ...]}"""
+    scores = score_roles(results, profiles)
+    roles = [r['role'] for r in results]
+
+    ranking = {}
+    for i, profile in enumerate(profiles):
+        order = np.argsort(-scores[:, i], kind='stable')
+        ranking[profile['name']] = [(roles[k], int(scores[k, i])) for k in order]
+    return ranking
+
+
+def main():
+    results_file = sys.argv[1] if len(sys.argv) > 1 else 'hh_intp_career_analysis.json'
+    profiles_file = sys.argv[2] if len(sys.argv) > 2 else None
+
+    with open(results_file, encoding='utf-8') as f:
+        results = json.load(f)
+
+    if profiles_file:
+        with open(profiles_file, encoding='utf-8') as f:
+            profiles = [make_profile(**p) for p in json.load(f)]
+    else:
+        profiles = [INTP_PROFILE]
+
+    for name, ranking in rank_roles(results, profiles).items():
+        print(f"\n🏆 Профиль: {name}")
+        print("-" * 50)
+        for role, score in ranking:
+            print(f"  {role:<35} | {score:>3}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+HeadHunter Crawl Coordinator
+Распределённая загрузка деталей вакансий: результаты поиска превращаются в очередь id
+(SQLite), воркеры забирают пачки с арендой (lease), разбирают их и пишут частичные агрегаты,
+редьюсер сводит их в обычный results/*.json. Аренда упавшего воркера истекает,
+и его вакансии возвращаются в очередь. Частота запросов к API ограничена общим
+для всех воркеров лимитом (в той же базе)
+"""
+
+import importlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from collections import Counter
+from multiprocessing import Process
+
+from detail_cache import cached_extract
+from hh_pagination import REQUESTS_PER_SECOND
+from near_duplicates import DuplicateFilter
+
+# Анализатор задачи (он же пространство имён разбора в detail_cache) -> модуль
+# с get_vacancies / get_vacancy_details / extract_description / extract_key_skills /
+# print_results / save_results и результатом формата analyze_vacancies
+ANALYZERS = {
+    'system': 'system_analyst_parser',
+    'risk': 'risk_analyst_parser',
+}
+
+QUEUE_DB = os.path.join("cache", "crawl_queue.sqlite")
+BATCH_SIZE = 20
+# Аренда продлевается перед каждой вакансией, поэтому покрывает одну вакансию, а не пачку:
+# худший случай - RETRIES попыток по timeout=10 сек плюс паузы Retry-After, с запасом
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 5      # после стольких попыток вакансия помечается failed
+
+
+class WorkQueue:
+    """
+    Очередь вакансий в SQLite (одна база на хост, WAL, доступ из нескольких процессов).
+    Воркеры используют только enqueue / claim / renew / throttle / complete / release / partials -
+    для общей очереди на несколько хостов достаточно реализовать эти методы поверх другого хранилища
+    """
+
+    def __init__(self, path=QUEUE_DB):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                job TEXT,
+                vacancy_id TEXT,
+                listing TEXT,
+                status TEXT DEFAULT 'queued',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER DEFAULT 0,
+                analyzer TEXT DEFAULT 'system',
+                PRIMARY KEY (job, vacancy_id)
+            )
+        """)
+        # Очередь, созданная до появления колонки analyzer
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")]
+        if 'analyzer' not in columns:
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN analyzer TEXT DEFAULT 'system'")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS partials (
+                job TEXT,
+                worker TEXT,
+                data TEXT,
+                created_at REAL
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (name TEXT PRIMARY KEY, next_time REAL)")
+
+    def enqueue(self, job, vacancies, analyzer='system'):
+        """Добавляет вакансии из get_vacancies; уже известные id не дублируются"""
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (job, vacancy_id, listing, analyzer) VALUES (?, ?, ?, ?)",
+                ((job, str(v['id']), json.dumps(v, ensure_ascii=False), analyzer) for v in vacancies)
+            )
+            return self.conn.total_changes - before
+
+    def reset(self, job):
+        """
+        Удаляет вакансии и частичные агрегаты задачи - перед новым запуском того же поиска.
+        Пачки прошлого запуска, которые ещё обрабатываются, complete() потом отбросит
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks WHERE job = ?", (job,))
+            self.conn.execute("DELETE FROM partials WHERE job = ?", (job,))
+
+    def claim(self, worker, batch_size=BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+        """
+        Атомарно берёт в аренду до batch_size вакансий: свободные и те, чья аренда истекла.
+        Возвращает [(job, analyzer, listing)]
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "UPDATE tasks SET status = 'failed' WHERE attempts >= ? "
+                "AND (status = 'queued' OR (status = 'leased' AND lease_until < ?))",
+                (MAX_ATTEMPTS, now)
+            )
+            rows = self.conn.execute(
+                "SELECT job, vacancy_id, listing, analyzer FROM tasks "
+                "WHERE status = 'queued' OR (status = 'leased' AND lease_until < ?) LIMIT ?",
+                (now, batch_size)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE job = ? AND vacancy_id = ?",
+                ((worker, now + lease_seconds, job, vacancy_id) for job, vacancy_id, _, _ in rows)
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [(job, analyzer, json.loads(listing)) for job, _, listing, analyzer in rows]
+
+    def renew(self, worker, lease_seconds=LEASE_SECONDS):
+        """Продлевает аренду всех вакансий воркера; возвращает, сколько их ещё за ним"""
+        with self.conn:
+            return self.conn.execute(
+                "UPDATE tasks SET lease_until = ? WHERE status = 'leased' AND worker = ?",
+                (time.time() + lease_seconds, worker)
+            ).rowcount
+
+    def throttle(self, rate=REQUESTS_PER_SECOND):
+        """
+        Общий для всех процессов лимит: не больше rate запросов в секунду.
+        Каждый вызов резервирует следующий свободный интервал и ждёт его (как RateLimiter)
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT next_time FROM rate_limit WHERE name = 'api'").fetchone()
+            now = time.time()
+            start = max(now, row[0] if row else 0.0)
+            self.conn.execute("INSERT OR REPLACE INTO rate_limit (name, next_time) VALUES ('api', ?)",
+                              (start + 1.0 / rate,))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        if start > now:
+            time.sleep(start - now)
+
+    def complete(self, worker, job, vacancy_ids, partial):
+        """
+        Сохраняет частичный агрегат и закрывает вакансии. Если аренда хотя бы одной уже
+        перешла к другому воркеру, пачка отбрасывается целиком (иначе вакансии посчитаются дважды)
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            closed = 0
+            for vacancy_id in vacancy_ids:
+                closed += self.conn.execute(
+                    "UPDATE tasks SET status = 'done', lease_until = NULL "
+                    "WHERE job = ? AND vacancy_id = ? AND status = 'leased' AND worker = ?",
+                    (job, str(vacancy_id), worker)
+                ).rowcount
+            if closed != len(vacancy_ids):
+                self.conn.execute("ROLLBACK")
+                return False
+            self.conn.execute(
+                "INSERT INTO partials (job, worker, data, created_at) VALUES (?, ?, ?, ?)",
+                (job, worker, json.dumps(partial, ensure_ascii=False), time.time())
+            )
+            self.conn.execute("COMMIT")
+            return True
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def release(self, worker, job, vacancy_ids):
+        """Возвращает вакансии в очередь сразу, не дожидаясь истечения аренды"""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'queued', worker = NULL, lease_until = NULL "
+                "WHERE job = ? AND vacancy_id = ? AND status = 'leased' AND worker = ?",
+                ((job, str(vacancy_id), worker) for vacancy_id in vacancy_ids)
+            )
+
+    def partials(self, job):
+        for (data,) in self.conn.execute("SELECT data FROM partials WHERE job = ? ORDER BY created_at", (job,)):
+            yield json.loads(data)
+
+    def jobs(self):
+        """[(job, analyzer)]"""
+        return self.conn.execute("SELECT DISTINCT job, analyzer FROM tasks ORDER BY job").fetchall()
+
+    def status(self):
+        """{job: {status: количество}}"""
+        result = {}
+        for job, status, count in self.conn.execute(
+            "SELECT job, status, COUNT(*) FROM tasks GROUP BY job, status"
+        ):
+            result.setdefault(job, {})[status] = count
+        return result
+
+    def pending(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN ('queued', 'leased')"
+        ).fetchone()[0]
+
+
+def process_batch(listings, analyzer='system', before_fetch=None):
+    """
+    Детали и разбор пачки вакансий одной задачи экстрактором её анализатора.
+    Возвращает (частичный агрегат, id без ответа). Агрегат - построчно по вакансиям вместе
+    с сигнатурой описания: почти-дубликаты из разных пачек отсеивает редьюсер,
+    до того как сложить счётчики.
+    before_fetch() вызывается перед каждой вакансией (продление аренды, общий лимит запросов)
+    """
+    module = importlib.import_module(ANALYZERS[analyzer])
+    partial = {'vacancies': []}
+    failed = []
+
+    for vacancy in listings:
+        if before_fetch:
+            before_fetch()
+        details = module.get_vacancy_details(vacancy['id'])
+        if not details:
+            failed.append(vacancy['id'])
+            continue
+
+        extracted = cached_extract(vacancy['id'], analyzer, lambda: module.extract_description(details),
+                                   module.EXTRACT_VERSION)
+
+        salary = details.get('salary')
+        if salary and salary.get('from'):
+            salary = {
+                'from': salary.get('from'),
+                'to': salary.get('to'),
+                'currency': salary.get('currency')
+            }
+        else:
+            salary = None
+
+        partial['vacancies'].append({
+            'id': vacancy['id'],
+            'title': vacancy.get('name'),
+            'employer': (vacancy.get('employer') or {}).get('id'),
+            'signature': extracted.get('signature'),
+            'skills': module.extract_key_skills(details),
+            'requirements': extracted['requirements'],
+            'salary': salary,
+            'experience': details.get('experience', {}).get('name'),
+        })
+
+    return partial, failed
+
+
+def run_worker(path=QUEUE_DB, batch_size=BATCH_SIZE, lease_seconds=LEASE_SECONDS, worker=None,
+               rate=REQUESTS_PER_SECOND):
+    """Забирает пачки, пока в очереди есть свободные вакансии; rate - общий лимит на всех воркеров"""
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    queue = WorkQueue(path)
+    done = 0
+
+    def before_fetch():
+        queue.renew(worker, lease_seconds)
+        queue.throttle(rate)
+
+    while True:
+        claimed = queue.claim(worker, batch_size, lease_seconds)
+        if not claimed:
+            break
+
+        by_job = {}
+        for job, analyzer, listing in claimed:
+            by_job.setdefault((job, analyzer), []).append(listing)
+
+        for (job, analyzer), listings in by_job.items():
+            partial, failed = process_batch(listings, analyzer, before_fetch)
+            ok_ids = [v['id'] for v in listings if v['id'] not in failed]
+            if failed:
+                queue.release(worker, job, failed)
+            if not ok_ids:
+                continue
+            if queue.complete(worker, job, ok_ids, partial):
+                done += len(ok_ids)
+            else:
+                print(f"[{worker}] аренда истекла, пачка {job} ({len(ok_ids)} шт.) отброшена")
+
+    print(f"[{worker}] обработано вакансий: {done}")
+    return done
+
+
+def reduce_job(queue, job):
+    """
+    Сводит частичные агрегаты задачи в словарь формата analyze_vacancies.
+    Почти-дубликаты (перепосты с тем же описанием) учитываются один раз, как в analyze_vacancies
+    """
+    skills, requirements, experience, titles = Counter(), Counter(), Counter(), Counter()
+    salary, vacancy_skills, vacancy_requirements, vacancy_employers = [], [], [], []
+    dedup = DuplicateFilter()
+
+    for partial in queue.partials(job):
+        for vacancy in partial['vacancies']:
+            if dedup.is_duplicate(vacancy['id'], vacancy['signature']):
+                continue
+
+            skills.update(vacancy['skills'])
+            vacancy_skills.append(vacancy['skills'])
+            requirements.update(vacancy['requirements'])
+            vacancy_requirements.append(vacancy['requirements'])
+            vacancy_employers.append(vacancy['employer'])
+            if vacancy['title']:
+                titles[vacancy['title']] += 1
+            if vacancy['salary']:
+                salary.append(vacancy['salary'])
+            if vacancy['experience']:
+                experience[vacancy['experience']] += 1
+
+    return {
+        'skills': skills,
+        'requirements': requirements,
+        'salary': salary,
+        'experience': experience,
+        'titles': titles,
+        'vacancy_skills': vacancy_skills,
+        'vacancy_requirements': vacancy_requirements,
+        'vacancy_employers': vacancy_employers,
+        'confidence': None,
+        'duplicates': dedup.summary(),
+        'total_analyzed': len(vacancy_skills),
+    }
+
+
+def results_filename(job):
+    return os.path.join("results", f"hh_{job}_results.json")
+
+
+def enqueue_search(queue, job, text, area=1, pages=10, analyzer='system'):
+    """
+    Поиск -> очередь. Перепосты отсеивает редьюсер по описаниям: по одной карточке,
+    без описания, вакансию не отбрасываем.
+    Каждый запуск начинает задачу заново: прошлые вакансии и агрегаты удаляются
+    """
+    vacancies = importlib.import_module(ANALYZERS[analyzer]).get_vacancies(text=text, area=area, pages=pages)
+    queue.reset(job)
+    added = queue.enqueue(job, vacancies, analyzer)
+    print(f"Задача {job}: найдено {len(vacancies)}, в очередь добавлено {added}")
+    return added
+
+
+def start_workers(count, path=QUEUE_DB, batch_size=BATCH_SIZE):
+    """Запускает count воркеров-процессов и ждёт, пока очередь опустеет"""
+    processes = [Process(target=run_worker, args=(path, batch_size)) for _ in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    # Воркер мог упасть с арендованной пачкой - дожидаемся истечения аренды и добираем
+    queue = WorkQueue(path)
+    if queue.pending():
+        print(f"В очереди осталось {queue.pending()} вакансий, дорабатываем...")
+        time.sleep(LEASE_SECONDS)
+        run_worker(path, batch_size)
+
+
+def reduce_all(path=QUEUE_DB):
+    queue = WorkQueue(path)
+    os.makedirs("results", exist_ok=True)
+    for job, analyzer in queue.jobs():
+        module = importlib.import_module(ANALYZERS[analyzer])
+        analysis = reduce_job(queue, job)
+        # У risk_analyst_parser заголовок отчёта - название набора
+        if analyzer == 'risk':
+            module.print_results(analysis, job)
+        else:
+            module.print_results(analysis)
+        module.save_results(analysis, results_filename(job))
+
+
+def print_status(path=QUEUE_DB):
+    for job, counts in WorkQueue(path).status().items():
+        print(f"{job:30} | " + ", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+
+def main():
+    usage = ("Использование:\n"
+             "  python crawl_coordinator.py enqueue <задача> <запрос> [регион] [страниц] [system|risk]\n"
+             "  python crawl_coordinator.py work [воркеров]\n"
+             "  python crawl_coordinator.py reduce\n"
+             "  python crawl_coordinator.py status")
+    if len(sys.argv) < 2:
+        print(usage)
+        return
+
+    command = sys.argv[1]
+    if command == "enqueue" and len(sys.argv) >= 4:
+        area = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+        pages = int(sys.argv[5]) if len(sys.argv) > 5 else 10
+        analyzer = sys.argv[6] if len(sys.argv) > 6 else 'system'
+        if analyzer not in ANALYZERS:
+            print(usage)
+            return
+        enqueue_search(WorkQueue(), sys.argv[2], sys.argv[3], area, pages, analyzer)
+    elif command == "work":
+        start_workers(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
+    elif command == "reduce":
+        reduce_all()
+    elif command == "status":
+        print_status()
+    else:
+        print(usage)
+
+
+if __name__ == "__main__":
+    main()
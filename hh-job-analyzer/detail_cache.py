@@ -0,0 +1,151 @@
+"""
+HeadHunter Vacancy Detail Cache
+Условные запросы (ETag / If-Modified-Since) к /vacancies/{id}: неизменившиеся вакансии
+не скачиваются заново, а результаты разбора описания (clean_html + экстракторы) переиспользуются.
+Детали хранятся и возвращаются в виде компактной VacancyRecord (только нужные поля)
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from hh_pagination import request_with_retry
+from vacancy_record import decode_vacancy, dumps_record, loads_record
+
+CACHE_DB = os.path.join("cache", "vacancies.sqlite")
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+STATS = {'fetched': 0, 'not_modified': 0, 'unchanged_body': 0, 'extract_hits': 0, 'extract_misses': 0}
+
+
+def _connection(path=None):
+    """Одно соединение SQLite на поток; path=None - текущий CACHE_DB"""
+    path = path or CACHE_DB
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    if path not in connections:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS vacancies (
+                id TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                body TEXT,
+                extracted TEXT,
+                fetched_at INTEGER
+            )
+        """)
+        connections[path] = conn
+    return connections[path]
+
+
+def _count(key):
+    with _stats_lock:
+        STATS[key] += 1
+
+
+def fetch_vacancy_details(vacancy_id, api_url, path=None, timeout=10):
+    """
+    Возвращает детали вакансии (VacancyRecord). Если в кэше есть валидаторы - отправляет условный запрос;
+    на 304 отдаёт сохранённую запись. 429/5xx повторяются с паузой (Retry-After),
+    остальные сетевые и HTTP-ошибки пробрасываются
+    """
+    conn = _connection(path)
+    row = conn.execute(
+        "SELECT etag, last_modified, body_hash, body FROM vacancies WHERE id = ?", (str(vacancy_id),)
+    ).fetchone()
+
+    headers = {}
+    if row:
+        etag, last_modified = row[0], row[1]
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    response = request_with_retry(f"{api_url}/vacancies/{vacancy_id}", headers=headers, timeout=timeout)
+
+    if response.status_code == 304 and row:
+        _count('not_modified')
+        return loads_record(row[3])
+
+    response.raise_for_status()
+    body_hash = hashlib.sha1(response.content).hexdigest()
+
+    if row and row[2] == body_hash:
+        # Валидаторов нет, но тело то же - сохраняем результаты разбора
+        _count('unchanged_body')
+        conn.execute(
+            "UPDATE vacancies SET etag = ?, last_modified = ?, fetched_at = ? WHERE id = ?",
+            (response.headers.get('ETag'), response.headers.get('Last-Modified'),
+             int(time.time()), str(vacancy_id))
+        )
+        conn.commit()
+        return loads_record(row[3])
+
+    _count('fetched')
+    details = decode_vacancy(response.content)
+    conn.execute(
+        "INSERT OR REPLACE INTO vacancies (id, etag, last_modified, body_hash, body, extracted, fetched_at) "
+        "VALUES (?, ?, ?, ?, ?, NULL, ?)",
+        (str(vacancy_id), response.headers.get('ETag'), response.headers.get('Last-Modified'),
+         body_hash, dumps_record(details), int(time.time()))
+    )
+    conn.commit()
+    return details
+
+
+def extractor_version(*functions):
+    """
+    Версия разбора - хэш исходников модулей, где определены функции-экстракторы.
+    Любая правка экстрактора, его паттернов или констант меняет версию
+    """
+    digest = hashlib.sha1()
+    for path in sorted({inspect.getsourcefile(function) for function in functions}):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def cached_extract(vacancy_id, namespace, compute, version=None, path=None):
+    """
+    Результат разбора вакансии (namespace - какой анализатор) из кэша,
+    compute() вызывается, если вакансия новая или изменилась или если результат
+    сохранён другой версией экстрактора (version, см. extractor_version)
+    """
+    conn = _connection(path)
+    row = conn.execute("SELECT extracted FROM vacancies WHERE id = ?", (str(vacancy_id),)).fetchone()
+    extracted = json.loads(row[0]) if row and row[0] else {}
+
+    entry = extracted.get(namespace)
+    if isinstance(entry, dict) and 'value' in entry and entry.get('version') == version:
+        _count('extract_hits')
+        return entry['value']
+
+    _count('extract_misses')
+    value = compute()
+    if row:
+        extracted[namespace] = {'version': version, 'value': value}
+        conn.execute("UPDATE vacancies SET extracted = ? WHERE id = ?",
+                     (json.dumps(extracted, ensure_ascii=False), str(vacancy_id)))
+        conn.commit()
+    return value
+
+
+def print_stats():
+    total = STATS['fetched'] + STATS['not_modified'] + STATS['unchanged_body']
+    if not total:
+        return
+    print(f"\nКэш деталей: новых/изменённых {STATS['fetched']}, 304 Not Modified {STATS['not_modified']}, "
+          f"то же тело {STATS['unchanged_body']} | разбор из кэша {STATS['extract_hits']}/"
+          f"{STATS['extract_hits'] + STATS['extract_misses']}")
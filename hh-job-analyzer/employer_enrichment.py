@@ -0,0 +1,152 @@
+"""
+HeadHunter Employer Enrichment
+Данные о работодателях (отрасль, тип, размер) для разбивки спроса по компаниям.
+Каждый работодатель запрашивается один раз, ответы хранятся в кэше на диске
+"""
+
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from hh_pagination import RateLimiter, request_with_retry
+
+API_URL = os.environ.get("HH_API_URL", "https://api.hh.ru")
+
+CACHE_FILE = os.path.join("cache", "employers.json")
+CACHE_TTL = 30 * 24 * 3600  # отрасль и тип компании меняются редко
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 8
+
+SIZE_BUCKETS = [(10, "до 10 вакансий"), (50, "10-49 вакансий"), (200, "50-199 вакансий")]
+SIZE_LARGEST = "200+ вакансий"
+
+
+def load_cache(path=CACHE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_cache(cache, path=CACHE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def employer_id(vacancy):
+    """id работодателя из вакансии (у анонимных вакансий его нет)"""
+    return (vacancy.get('employer') or {}).get('id')
+
+
+def size_bucket(open_vacancies):
+    """Размер работодателя по числу открытых вакансий на HH"""
+    if open_vacancies is None:
+        return "неизвестно"
+    for limit, label in SIZE_BUCKETS:
+        if open_vacancies < limit:
+            return label
+    return SIZE_LARGEST
+
+
+def fetch_employer(emp_id, limiter):
+    """Загружает /employers/{id} (429/5xx повторяются с паузой) и оставляет только нужные поля"""
+    try:
+        response = request_with_retry(f"{API_URL}/employers/{emp_id}", limiter=limiter, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+    except requests.RequestException as e:
+        print(f"  Ошибка при получении работодателя {emp_id}: {e}")
+        return None
+
+    return {
+        'name': data.get('name'),
+        'type': data.get('type'),
+        'industries': [i['name'] for i in data.get('industries', [])],
+        'area': (data.get('area') or {}).get('name'),
+        'open_vacancies': data.get('open_vacancies'),
+        'fetched_at': int(time.time()),
+    }
+
+
+def enrich_employers(employer_ids, cache_path=CACHE_FILE, ttl=CACHE_TTL):
+    """
+    Возвращает {id: данные работодателя} для всех уникальных id.
+    Запрашиваются только отсутствующие или устаревшие в кэше
+    """
+    cache = load_cache(cache_path)
+    now = time.time()
+
+    unique = {emp_id for emp_id in employer_ids if emp_id}
+    missing = [emp_id for emp_id in unique
+               if emp_id not in cache or now - cache[emp_id]['fetched_at'] > ttl]
+
+    if missing:
+        print(f"  Работодатели: {len(unique)} уникальных, загружаю {len(missing)}...")
+        limiter = RateLimiter(REQUESTS_PER_SECOND)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for emp_id, info in zip(missing, executor.map(lambda e: fetch_employer(e, limiter), missing)):
+                if info:
+                    cache[emp_id] = info
+        save_cache(cache, cache_path)
+
+    return {emp_id: cache[emp_id] for emp_id in unique if emp_id in cache}
+
+
+def employer_breakdown(vacancy_employers, vacancy_requirements, employers, top=15):
+    """
+    Разбивка проанализированных вакансий по работодателям, отраслям и размеру,
+    плюс какие работодатели чаще всего требуют каждое из топ-требований
+    """
+    by_employer = Counter()
+    by_industry = Counter()
+    by_size = Counter()
+    by_type = Counter()
+    requirement_employers = defaultdict(Counter)
+
+    for emp_id, requirements in zip(vacancy_employers, vacancy_requirements):
+        info = employers.get(emp_id)
+        if not info:
+            by_employer['(аноним / нет данных)'] += 1
+            continue
+
+        by_employer[info['name']] += 1
+        by_industry.update(info['industries'] or ['(отрасль не указана)'])
+        by_size[size_bucket(info['open_vacancies'])] += 1
+        by_type[info['type'] or 'unknown'] += 1
+
+        for requirement in requirements:
+            requirement_employers[requirement][info['name']] += 1
+
+    top_requirements = Counter({req: sum(c.values()) for req, c in requirement_employers.items()})
+
+    return {
+        'employers': dict(by_employer.most_common(top)),
+        'industries': dict(by_industry.most_common(top)),
+        'size': dict(by_size),
+        'type': dict(by_type),
+        'requirement_drivers': {
+            req: dict(requirement_employers[req].most_common(5))
+            for req, _ in top_requirements.most_common(top)
+        },
+    }
+
+
+def print_breakdown(breakdown, name):
+    print(f"\n--- РАБОТОДАТЕЛИ: {name} ---")
+    for employer, count in breakdown['employers'].items():
+        print(f"  {count:3} | {employer[:60]}")
+
+    print("\n  Отрасли:")
+    for industry, count in breakdown['industries'].items():
+        print(f"  {count:3} | {industry[:60]}")
+
+    print("\n  Размер (открытых вакансий на HH):")
+    for size, count in breakdown['size'].items():
+        print(f"  {count:3} | {size}")
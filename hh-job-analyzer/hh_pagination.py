@@ -0,0 +1,102 @@
+"""
+HeadHunter Parallel Pagination
+Параллельная загрузка страниц поиска: первая страница сообщает число страниц,
+остальные запрашиваются одновременно в рамках лимита запросов
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+MAX_PAGES = 20  # глубина выдачи API: не больше 2000 вакансий (20 страниц по 100)
+MAX_WORKERS = 5
+REQUESTS_PER_SECOND = 8
+RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Ограничивает частоту запросов: не больше rate стартов в секунду на все потоки"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def request_with_retry(url, params=None, headers=None, limiter=None, retries=RETRIES, timeout=10):
+    """
+    GET с повторами при 429/5xx (пауза из Retry-After или экспоненциальная) и сетевых ошибках.
+    Возвращает последний ответ; сетевая ошибка последней попытки пробрасывается
+    """
+    for attempt in range(retries):
+        if limiter:
+            limiter.wait()
+        try:
+            response = requests.get(url, params=params, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            if attempt == retries - 1:
+                raise
+            time.sleep(2 ** attempt)
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < retries - 1:
+            retry_after = response.headers.get('Retry-After')
+            time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt)
+            continue
+        return response
+
+
+def fetch_page(url, params, page, limiter, retries=RETRIES, timeout=10):
+    """
+    Загружает одну страницу с повторами при 429/5xx и сетевых ошибках.
+    Возвращает JSON страницы или None
+    """
+    try:
+        response = request_with_retry(url, dict(params, page=page), limiter=limiter,
+                                      retries=retries, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException as e:
+        print(f"  Ошибка при получении страницы {page}: {e}")
+        return None
+
+
+def fetch_all_pages(url, params, pages, max_workers=MAX_WORKERS, rate=REQUESTS_PER_SECOND):
+    """
+    Загружает до pages страниц: страница 0 - сразу, остальные - параллельно.
+    Возвращает (items в порядке страниц, found)
+    """
+    limiter = RateLimiter(rate)
+
+    first = fetch_page(url, params, 0, limiter)
+    if not first or not first.get('items'):
+        return [], 0
+
+    total_pages = min(pages, first.get('pages', 1))
+    items = list(first['items'])
+
+    if total_pages > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map сохраняет порядок страниц
+            results = executor.map(
+                lambda page: fetch_page(url, params, page, limiter),
+                range(1, total_pages)
+            )
+            for page, data in enumerate(results, start=1):
+                if data is None:
+                    print(f"  Страница {page + 1} пропущена после {RETRIES} попыток")
+                    continue
+                items.extend(data.get('items', []))
+
+    return items, first.get('found', len(items))
@@ -0,0 +1,414 @@
+"""
+HeadHunter API Simulator
+Локальный заменитель api.hh.ru для нагрузочного тестирования и проверки отказоустойчивости:
+синтетические /vacancies, /vacancies/{id}, /employers/{id} с настраиваемыми задержками,
+ошибками 429/5xx, Retry-After, лимитом пагинации и ETag/304 для деталей вакансий.
+
+    python hh_simulator.py serve [порт]    # только сервер
+    python hh_simulator.py bench [intp system risk]   # сервер + прогон реальных анализаторов
+"""
+
+import hashlib
+import json
+import random
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+DEFAULT_CONFIG = {
+    'vacancies': 1500,          # всего вакансий в «базе»
+    'employers': 120,
+    'max_items': 2000,          # как у HH: глубже page * per_page не отдаём
+    'latency_median_ms': 40,    # логнормальная задержка ответа
+    'latency_sigma': 0.6,
+    'error_429_rate': 0.03,
+    'error_5xx_rate': 0.02,
+    'retry_after': 1,           # секунд в заголовке Retry-After для 429
+    'repost_rate': 0.1,         # доля перепостов уже опубликованных вакансий с мелкими правками
+    'seed': 42,
+    'start_ts': 1788220800,     # публикация первой вакансии (2026-09-01): тела и ETag одинаковы от запуска к запуску
+}
+
+# Анализатор -> поисковый запрос для нагрузочного теста
+BENCH_QUERIES = {
+    'intp': 'аналитик',
+    'system': 'Системный аналитик',
+    'risk': 'NAME:(AML OR риск-аналитик)',
+}
+
+SKILLS = ['SQL', 'BPMN', 'UML', 'MS Excel', 'Excel', 'Jira', 'Atlassian Confluence', 'REST API',
+          'Python', 'PostgreSQL', 'Kafka', 'Аналитическое мышление', 'Деловая коммуникация',
+          'Деловое общение', 'AML', 'KYC', 'Power BI', 'Английский язык', 'User Story', 'Use case']
+
+DESCRIPTION_PARTS = ['опыт работы с SQL', 'знание BPMN и UML', 'работа в Jira и Confluence',
+                     'интеграции REST API, Kafka', 'гибридный формат работы', 'python для автоматизации',
+                     'разработка backend на django', 'знание AML/KYC, 115-ФЗ', 'английский язык B2',
+                     'кредитный риск, PD, LGD', 'высшее образование', 'react frontend']
+
+EXPERIENCE = [('noExperience', 'Нет опыта'), ('between1And3', 'От 1 года до 3 лет'),
+              ('between3And6', 'От 3 до 6 лет'), ('moreThan6', 'Более 6 лет')]
+SCHEDULE = [('fullDay', 'Полный день'), ('remote', 'Удаленная работа'), ('flexible', 'Гибкий график')]
+
+
+def build_dataset(config):
+    """Детерминированная синтетическая база вакансий и работодателей"""
+    rng = random.Random(config['seed'])
+
+    employers = {
+        str(100 + i): {
+            'id': str(100 + i),
+            'name': f"Компания {i}",
+            'type': rng.choice(['company', 'agency']),
+            'industries': [{'id': '7.540', 'name': rng.choice(['Банк', 'ИТ', 'Ритейл', 'Телеком'])}],
+            'area': {'id': '1', 'name': 'Москва'},
+            'open_vacancies': rng.randint(1, 400),
+        }
+        for i in range(config['employers'])
+    }
+    employer_ids = list(employers)
+
+    vacancies = []
+    start = config['start_ts']
+    for i in range(config['vacancies']):
+        vacancy_id = str(90000000 + i)
+        employer = employers[rng.choice(employer_ids)]
+        published = time.strftime('%Y-%m-%dT%H:%M:%S+0300', time.gmtime(start + i * 1700 + 3 * 3600))
+        salary_from = rng.choice([None, rng.randrange(60000, 350000, 5000)])
+        exp = rng.choice(EXPERIENCE)
+        schedule = rng.choice(SCHEDULE)
+        details = {
+            'id': vacancy_id,
+            'name': rng.choice(['Системный аналитик', 'Бизнес-аналитик', 'AML аналитик', 'Риск-аналитик']),
+            'employer': {'id': employer['id'], 'name': employer['name']},
+            'published_at': published,
+            'description': '<p>' + '</p><p>'.join(rng.sample(DESCRIPTION_PARTS, rng.randint(2, 6))) + '</p>',
+            'key_skills': [{'name': s} for s in rng.sample(SKILLS, rng.randint(0, 8))],
+            'salary': None if salary_from is None else {
+                'from': salary_from, 'to': salary_from + 50000, 'currency': 'RUR', 'gross': False
+            },
+            'experience': {'id': exp[0], 'name': exp[1]},
+            'schedule': {'id': schedule[0], 'name': schedule[1]},
+            'area': {'id': '1', 'name': 'Москва'},
+        }
+        if vacancies and rng.random() < config['repost_rate']:
+            original = rng.choice(vacancies)
+            details.update(
+                name=original['name'],
+                employer=original['employer'],
+                description=original['description'] + '<p>Откликайтесь!</p>',
+                key_skills=original['key_skills'],
+            )
+        vacancies.append(details)
+
+    # Как на HH: по умолчанию новые сверху
+    vacancies.reverse()
+    return vacancies, {v['id']: v for v in vacancies}, employers
+
+
+def matches_text(details, text):
+    """Упрощённый поиск HH: фразы через OR, NAME:(...) - только по названию"""
+    text = (text or '').strip()
+    if not text:
+        return True
+
+    name_only = re.fullmatch(r'NAME:\((.*)\)', text)
+    if name_only:
+        text = name_only.group(1)
+        haystack = details['name'].lower()
+    else:
+        haystack = (details['name'] + ' ' + details['description']).lower()
+
+    phrases = [p.strip().strip('"').lower() for p in re.split(r'\s+OR\s+', text)]
+    return any(phrase and all(word in haystack for word in phrase.split()) for phrase in phrases)
+
+
+def search(sim, text=None, order_by=None, date_from=None, date_to=None):
+    """Вакансии, которые вернёт /vacancies с этими параметрами (без пагинации)"""
+    key = (text, order_by, date_from, date_to)
+    if key not in sim['searches']:
+        found = [v for v in sim['vacancies']
+                 if matches_text(v, text) and (not date_from or v['published_at'] >= date_from)
+                 and (not date_to or v['published_at'] <= date_to)]
+        if order_by == 'publication_time':
+            found.sort(key=lambda v: v['published_at'], reverse=True)
+        sim['searches'][key] = found
+    return sim['searches'][key]
+
+
+def listing_item(details):
+    """Краткая карточка вакансии, как в ответе /vacancies"""
+    return {key: details[key] for key in ('id', 'name', 'employer', 'published_at', 'salary', 'area')}
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов; состояние симулятора - в server.sim"""
+
+    def do_GET(self):
+        sim = self.server.sim
+        rng = random.Random()
+
+        time.sleep(rng.lognormvariate(0, sim['config']['latency_sigma'])
+                   * sim['config']['latency_median_ms'] / 1000)
+
+        roll = rng.random()
+        if roll < sim['config']['error_429_rate']:
+            return self.reply(429, {'errors': [{'type': 'too_many_requests'}]},
+                              {'Retry-After': str(sim['config']['retry_after'])})
+        if roll < sim['config']['error_429_rate'] + sim['config']['error_5xx_rate']:
+            return self.reply(rng.choice([500, 502, 503]), {'errors': [{'type': 'server_error'}]})
+
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+
+        if parts == ['vacancies']:
+            return self.list_vacancies(parse_qs(url.query))
+        if len(parts) == 2 and parts[0] == 'vacancies' and parts[1] in sim['by_id']:
+            return self.vacancy_details(sim['by_id'][parts[1]])
+        if len(parts) == 2 and parts[0] == 'employers' and parts[1] in sim['employers']:
+            return self.reply(200, sim['employers'][parts[1]])
+        return self.reply(404, {'errors': [{'type': 'not_found'}]})
+
+    def list_vacancies(self, query):
+        sim = self.server.sim
+        page = int(query.get('page', ['0'])[0])
+        per_page = min(int(query.get('per_page', ['20'])[0]), 100)
+
+        vacancies = search(sim, query.get('text', [None])[0], query.get('order_by', [None])[0],
+                           query.get('date_from', [None])[0], query.get('date_to', [None])[0])
+
+        found = len(vacancies)
+        reachable = min(found, sim['config']['max_items'])
+        if (page + 1) * per_page > sim['config']['max_items']:
+            return self.reply(400, {'errors': [{'type': 'bad_argument', 'value': 'page'}]})
+
+        items = vacancies[page * per_page:(page + 1) * per_page]
+        return self.reply(200, {
+            'items': [listing_item(v) for v in items],
+            'found': found,
+            'pages': -(-reachable // per_page),
+            'page': page,
+            'per_page': per_page,
+        })
+
+    def vacancy_details(self, details):
+        body = json.dumps(details, ensure_ascii=False).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.reply(304, None, {'ETag': etag})
+        return self.reply(200, details, {'ETag': etag}, body=body)
+
+    def reply(self, status, payload, headers=None, body=None):
+        if body is None:
+            body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+        with self.server.sim['lock']:
+            self.server.sim['statuses'][status] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_simulator(port=0, **overrides):
+    """Запускает симулятор в фоновом потоке, возвращает (server, base_url)"""
+    config = dict(DEFAULT_CONFIG, **overrides)
+    vacancies, by_id, employers = build_dataset(config)
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), SimulatorHandler)
+    server.daemon_threads = True
+    server.sim = {
+        'config': config,
+        'vacancies': vacancies,
+        'by_id': by_id,
+        'employers': employers,
+        'searches': {},
+        'statuses': Counter(),
+        'lock': threading.Lock(),
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class RequestRecorder:
+    """Замеряет каждый вызов requests.get на стороне клиента (задержка и статус)"""
+
+    def __init__(self):
+        self.original = requests.get
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.statuses = Counter()
+
+    def __enter__(self):
+        def recorded_get(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                response = self.original(*args, **kwargs)
+            except requests.RequestException:
+                with self.lock:
+                    self.statuses['network_error'] += 1
+                raise
+            with self.lock:
+                self.latencies.append(time.perf_counter() - start)
+                self.statuses[response.status_code] += 1
+            return response
+
+        requests.get = recorded_get
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        requests.get = self.original
+        return False
+
+
+def _run_analyzer(name, base_url, text, pages, max_details):
+    """Поиск + анализ деталей реальным анализатором; возвращает (вакансии, проанализировано, время поиска)"""
+    if name == 'intp':
+        import intp_career_analyzer as analyzer
+    elif name == 'system':
+        import system_analyst_parser as analyzer
+    else:
+        import risk_analyst_parser as analyzer
+    analyzer.API_URL = base_url
+
+    started = time.perf_counter()
+    vacancies = analyzer.get_vacancies(text, pages=pages)
+    listed = time.perf_counter() - started
+
+    if name == 'intp':
+        analyzed = analyzer.analyze_role(vacancies, "Симулятор", max_details=max_details)['analyzed']
+    elif name == 'system':
+        analyzed = analyzer.analyze_vacancies(vacancies, max_details=max_details)['total_analyzed']
+    else:
+        analyzed = analyzer.analyze_vacancies(vacancies, max_details=max_details, dataset='bench')['total_analyzed']
+    return vacancies, analyzed, listed
+
+
+def run_benchmark(analyzer='intp', pages=10, max_details=200, cache_dir=None, **overrides):
+    """
+    Прогоняет get_vacancies + анализ деталей анализатора (intp / system / risk)
+    против симулятора и возвращает отчёт: пропускная способность, хвостовые задержки, потери.
+    Кэш деталей - в cache_dir (по умолчанию временная папка), а не в рабочем cache/vacancies.sqlite;
+    общий cache_dir для нескольких прогонов проверяет условные запросы (304)
+    """
+    import detail_cache
+
+    server, base_url = start_simulator(**overrides)
+    sim = server.sim
+    text = BENCH_QUERIES[analyzer]
+    cache_before = dict(detail_cache.STATS)
+
+    own_dir = cache_dir is None
+    if own_dir:
+        cache_dir = tempfile.mkdtemp(prefix='hh_bench_')
+    production_db = detail_cache.CACHE_DB
+    detail_cache.CACHE_DB = os.path.join(cache_dir, 'vacancies.sqlite')
+    try:
+        with RequestRecorder() as recorder:
+            started = time.perf_counter()
+            vacancies, analyzed, listed = _run_analyzer(analyzer, base_url, text, pages, max_details)
+            elapsed = time.perf_counter() - started
+    finally:
+        detail_cache.CACHE_DB = production_db
+        server.shutdown()
+        if own_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    expected_items = search(sim, text)
+    expected = min(len(expected_items), sim['config']['max_items'], pages * 100)
+    ids = [v['id'] for v in vacancies]
+    latencies = sorted(recorder.latencies)
+
+    return {
+        'analyzer': analyzer,
+        'query': text,
+        'requests': len(latencies),
+        'elapsed_sec': round(elapsed, 2),
+        'listing_sec': round(listed, 2),
+        'requests_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'vacancies_per_sec': round(analyzed / (elapsed - listed), 2) if elapsed > listed else 0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.5) * 1000, 1),
+            'p95': round(percentile(latencies, 0.95) * 1000, 1),
+            'p99': round(percentile(latencies, 0.99) * 1000, 1),
+            'max': round(latencies[-1] * 1000, 1) if latencies else 0,
+        },
+        'client_statuses': dict(recorder.statuses),
+        'server_statuses': dict(sim['statuses']),
+        'detail_cache': {key: detail_cache.STATS[key] - cache_before[key] for key in cache_before},
+        'correctness': {
+            'listed': len(ids),
+            'expected_listed': expected,
+            'duplicates': len(ids) - len(set(ids)),
+            'in_order': ids == [v['id'] for v in expected_items[:len(ids)]],
+            'analyzed': analyzed,
+            'requested_details': min(max_details, len(ids)),
+        },
+    }
+
+
+def print_benchmark(report):
+    print("\n" + "="*60)
+    print(f"НАГРУЗОЧНЫЙ ТЕСТ ПРОТИВ СИМУЛЯТОРА HH: {report['analyzer']} ({report['query']})")
+    print("="*60)
+    print(f"Запросов: {report['requests']} за {report['elapsed_sec']} сек "
+          f"({report['requests_per_sec']} запр/сек)")
+    print(f"Список вакансий: {report['listing_sec']} сек | "
+          f"Детали: {report['vacancies_per_sec']} вакансий/сек")
+
+    lat = report['latency_ms']
+    print(f"Задержка, мс: p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}")
+    print(f"Статусы (клиент): {report['client_statuses']}")
+    print(f"Кэш деталей: {report['detail_cache']}")
+
+    c = report['correctness']
+    print(f"\nКорректность:")
+    print(f"  • Получено в списке: {c['listed']} из {c['expected_listed']} "
+          f"(дубликатов: {c['duplicates']}, порядок {'верный' if c['in_order'] else 'НАРУШЕН'})")
+    print(f"  • Детали: {c['analyzed']} из {c['requested_details']}")
+
+
+def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'bench'
+
+    if mode == 'serve':
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8766
+        server, base_url = start_simulator(port=port)
+        print(f"Симулятор HH API: {base_url} (HH_API_URL={base_url} python ...)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        # Общий временный кэш: следующие анализаторы получают уже виденные вакансии через 304
+        cache_dir = tempfile.mkdtemp(prefix='hh_bench_')
+        try:
+            for analyzer in sys.argv[2:] or list(BENCH_QUERIES):
+                print_benchmark(run_benchmark(analyzer, cache_dir=cache_dir))
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
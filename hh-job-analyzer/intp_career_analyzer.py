@@ -4,6 +4,7 @@ HeadHunter Career Analyzer for INTP with Applied Informatics
 без сильного программирования, с гибридом
 """
 
+import os
 import requests
 import time
 import re
@@ -11,6 +12,36 @@ from collections import Counter
 from html import unescape
 import json
 
+from adaptive_sampling import PrecisionTracker, sample_order
+from career_scoring import INTP_PROFILE, profile_boundaries, score_roles
+from detail_cache import cached_extract, extractor_version, fetch_vacancy_details, print_stats
+from hh_pagination import MAX_PAGES, fetch_all_pages
+from near_duplicates import DuplicateFilter, signature_list
+from skill_aliases import canonicalize_skills
+from skill_cooccurrence import skill_associations
+from snapshot_store import append_snapshot
+from vacancy_export import VacancyExporter, vacancy_row
+
+# Адрес API (можно подменить на локальный симулятор, см. hh_simulator.py)
+API_URL = os.environ.get("HH_API_URL", "https://api.hh.ru")
+
+# Случайная выборка по всей выдаче с остановкой по точности вместо первых N вакансий
+ADAPTIVE_SAMPLING = True
+
+# Роли для анализа (подходящие для INTP без желания кодить)
+ROLES = [
+    ('NAME:("бизнес аналитик" OR "бизнес-аналитик" OR "business analyst")', "Бизнес-аналитик"),
+    ('NAME:("системный аналитик" OR "system analyst")', "Системный аналитик"),
+    ('NAME:("продуктовый аналитик" OR "product analyst")', "Продуктовый аналитик"),
+    ('NAME:(тестировщик OR QA OR "ручной тестировщик" OR "manual qa")', "QA/Тестировщик (ручной)"),
+    ('NAME:("технический писатель" OR "technical writer" OR "tech writer")', "Технический писатель"),
+    ('NAME:("аналитик данных" OR "data analyst") NOT NAME:(senior OR lead)', "Аналитик данных (Junior)"),
+    ('NAME:("менеджер проектов" OR "project manager" OR PM) NOT NAME:(senior)', "Менеджер проектов"),
+    ('NAME:(product owner OR "владелец продукта" OR PO)', "Product Owner"),
+    ('NAME:("ux исследователь" OR "ux researcher" OR "user researcher")', "UX Researcher"),
+    ('NAME:(пресейл OR presale OR "it консультант" OR "it-консультант")', "IT-Консультант/Presale"),
+]
+
 def clean_html(html_text):
     if not html_text:
         return ""
@@ -19,17 +50,35 @@ def clean_html(html_text):
     clean = re.sub(r'\s+', ' ', clean).strip()
     return clean
 
-def get_vacancies(text, area=1, pages=5):
+def get_vacancies(text, area=1, pages=5, order_by=None, date_from=None, parallel=True):
+    """
+    order_by="publication_time" - сначала новые
+    date_from - только вакансии, опубликованные не раньше этой даты (ISO 8601)
+    parallel=True - страницы после первой загружаются параллельно
+    """
+    if parallel:
+        params = {"text": text, "area": area, "per_page": 100}
+        if order_by:
+            params["order_by"] = order_by
+        if date_from:
+            params["date_from"] = date_from
+        all_vacancies, _ = fetch_all_pages(f"{API_URL}/vacancies", params, pages)
+        return all_vacancies
+    
     all_vacancies = []
     
     for page in range(pages):
-        url = "https://api.hh.ru/vacancies"
+        url = f"{API_URL}/vacancies"
         params = {
             "text": text,
             "area": area,
             "per_page": 100,
             "page": page
         }
+        if order_by:
+            params["order_by"] = order_by
+        if date_from:
+            params["date_from"] = date_from
         
         try:
             response = requests.get(url, params=params, timeout=10)
@@ -53,11 +102,8 @@ def get_vacancies(text, area=1, pages=5):
     return all_vacancies
 
 def get_vacancy_details(vacancy_id):
-    url = f"https://api.hh.ru/vacancies/{vacancy_id}"
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return fetch_vacancy_details(vacancy_id, API_URL)
     except requests.RequestException:
         return None
 
@@ -129,10 +175,28 @@ def extract_coding_level(description):
         return 1  # Light coding/scripting
     return 0  # No coding
 
-def analyze_role(vacancies, role_name, max_details=60):
-    """Анализирует вакансии для конкретной роли"""
+def extract_description(vacancy_details):
+    """Разбирает описание вакансии: формат работы и уровень кодинга"""
+    description = clean_html(vacancy_details.get('description', ''))
+    return {
+        'work_format': check_hybrid_remote(vacancy_details),
+        'coding_level': extract_coding_level(description),
+        'signature': signature_list(description),
+    }
+
+# Сменилась версия - разбор из кэша пересчитывается
+EXTRACT_VERSION = extractor_version(extract_description, signature_list)
+
+def analyze_role(vacancies, role_name, max_details=60, tracker=None, exporter=None, dedup=None):
+    """
+    Анализирует вакансии для конкретной роли
+    tracker - PrecisionTracker: остановиться раньше max_details, когда метрики стабильны
+    exporter - VacancyExporter: построчная выгрузка каждой вакансии
+    dedup - DuplicateFilter: перепосты одной и той же вакансии учитываются один раз
+    """
     all_skills = []
     all_requirements = []
+    vacancy_skills = []
     salary_data = []
     experience_data = []
     work_format = []
@@ -146,31 +210,45 @@ def analyze_role(vacancies, role_name, max_details=60):
         if count >= max_details:
             break
         
+        # Карточка совпадает с уже учтённой - детали не загружаем
+        if dedup and dedup.is_listing_duplicate(vacancy):
+            continue
+        
         details = get_vacancy_details(vacancy['id'])
         
         if not details:
             continue
+        
+        # Разбор описания берётся из кэша, пока вакансия не изменилась
+        extracted = cached_extract(vacancy['id'], 'intp', lambda: extract_description(details), EXTRACT_VERSION)
+        
+        # Почти такое же описание уже учтено - перепост не считаем
+        if dedup and dedup.is_duplicate(vacancy['id'], extracted.get('signature')):
+            time.sleep(0.1)
+            continue
             
         count += 1
         
         # Ключевые навыки
+        skills = []
         if 'key_skills' in details:
-            skills = [s['name'] for s in details['key_skills']]
+            skills = canonicalize_skills(s['name'] for s in details['key_skills'])
             all_skills.extend(skills)
+            vacancy_skills.append(skills)
         
         # Формат работы
-        format_type = check_hybrid_remote(details)
+        format_type = extracted['work_format']
         work_format.append(format_type)
         if format_type != "Офис":
             hybrid_count += 1
         
         # Junior-friendly
-        if check_no_experience(details):
+        is_junior = check_no_experience(details)
+        if is_junior:
             junior_count += 1
         
         # Уровень кодинга
-        description = clean_html(details.get('description', ''))
-        coding = extract_coding_level(description)
+        coding = extracted['coding_level']
         coding_levels.append(coding)
         
         # Зарплата
@@ -186,6 +264,15 @@ def analyze_role(vacancies, role_name, max_details=60):
         if exp:
             experience_data.append(exp)
         
+        if exporter:
+            exporter.write(vacancy_row(role_name, vacancy, details, skills=skills,
+                                       work_format=format_type, coding_level=coding))
+        
+        # Достаточно ли уже точности
+        if tracker and tracker.add(junior=is_junior, hybrid=format_type != "Офис",
+                                   coding=coding, skills=skills):
+            break
+        
         time.sleep(0.1)
     
     # Статистика
@@ -196,12 +283,15 @@ def analyze_role(vacancies, role_name, max_details=60):
         'total': len(vacancies),
         'analyzed': count,
         'skills': Counter(all_skills),
+        'vacancy_skills': vacancy_skills,
         'experience': Counter(experience_data),
         'salary': salary_data,
         'work_format': Counter(work_format),
         'junior_friendly': junior_count,
         'hybrid_remote': hybrid_count,
         'avg_coding_level': avg_coding,
+        'confidence': tracker.report() if tracker else None,
+        'duplicates': dedup.summary() if dedup else None,
     }
 
 def print_role_results(result):
@@ -210,6 +300,9 @@ def print_role_results(result):
     print(f"📌 {result['role']}")
     print(f"{'='*70}")
     print(f"Вакансий найдено: {result['total']} | Проанализировано: {result['analyzed']}")
+    if result.get('duplicates'):
+        d = result['duplicates']
+        print(f"Дубли (перепосты): {d['duplicates']}, не загружено по карточке: {d['skipped_before_fetch']}")
     
     # Метрики для INTP
     junior_pct = result['junior_friendly'] / result['analyzed'] * 100 if result['analyzed'] else 0
@@ -223,6 +316,12 @@ def print_role_results(result):
     print(f"  • Гибрид/Удалёнка: {result['hybrid_remote']}/{result['analyzed']} ({hybrid_pct:.0f}%)")
     print(f"  • Уровень кодинга: {coding_text} ({coding:.1f}/3)")
     
+    # Точность оценок при адаптивной выборке
+    if result.get('confidence'):
+        print(f"\n📐 95% доверительные интервалы:")
+        for name, ci in result['confidence'].items():
+            print(f"  • {name:35} {ci['estimate']:>6} [{ci['low']} - {ci['high']}]")
+    
     # Зарплаты
     if result['salary']:
         from_vals = [s['from'] for s in result['salary']]
@@ -246,46 +345,8 @@ def print_role_results(result):
 
 def calculate_intp_score(result):
     """Рассчитывает INTP-совместимость роли (0-100)"""
-    score = 50  # Базовый балл
-    
-    # +20 за низкий кодинг
-    coding = result['avg_coding_level']
-    if coding < 1:
-        score += 20
-    elif coding < 2:
-        score += 10
-    elif coding >= 2.5:
-        score -= 10
-    
-    # +15 за гибрид/удалёнку
-    hybrid_pct = result['hybrid_remote'] / result['analyzed'] * 100 if result['analyzed'] else 0
-    if hybrid_pct >= 30:
-        score += 15
-    elif hybrid_pct >= 15:
-        score += 8
-    
-    # +15 за доступность джунам
-    junior_pct = result['junior_friendly'] / result['analyzed'] * 100 if result['analyzed'] else 0
-    if junior_pct >= 30:
-        score += 15
-    elif junior_pct >= 15:
-        score += 8
-    
-    # +10 за аналитическую работу (INTP любит анализ)
-    analytical_skills = ['аналитическое мышление', 'анализ данных', 'аналитика', 
-                        'системное мышление', 'исследовани']
-    skill_names = [s.lower() for s in result['skills'].keys()]
-    analytical_count = sum(1 for a in analytical_skills if any(a in s for s in skill_names))
-    if analytical_count >= 2:
-        score += 10
-    
-    # +5 за хорошую зарплату
-    if result['salary']:
-        avg_salary = sum(s['from'] for s in result['salary']) / len(result['salary'])
-        if avg_salary >= 150000:
-            score += 5
-    
-    return min(100, max(0, score))
+    # Правила оценки описаны в профиле INTP_PROFILE (career_scoring.py)
+    return int(score_roles([result], [INTP_PROFILE])[0, 0])
 
 def main():
     print("="*70)
@@ -293,38 +354,39 @@ def main():
     print("   Прикладная информатика | Без опыта | Минимум кода | Гибрид")
     print("="*70)
     
-    # Роли для анализа (подходящие для INTP без желания кодить)
-    roles = [
-        ('NAME:("бизнес аналитик" OR "бизнес-аналитик" OR "business analyst")', "Бизнес-аналитик"),
-        ('NAME:("системный аналитик" OR "system analyst")', "Системный аналитик"),
-        ('NAME:("продуктовый аналитик" OR "product analyst")', "Продуктовый аналитик"),
-        ('NAME:(тестировщик OR QA OR "ручной тестировщик" OR "manual qa")', "QA/Тестировщик (ручной)"),
-        ('NAME:("технический писатель" OR "technical writer" OR "tech writer")', "Технический писатель"),
-        ('NAME:("аналитик данных" OR "data analyst") NOT NAME:(senior OR lead)', "Аналитик данных (Junior)"),
-        ('NAME:("менеджер проектов" OR "project manager" OR PM) NOT NAME:(senior)', "Менеджер проектов"),
-        ('NAME:(product owner OR "владелец продукта" OR PO)', "Product Owner"),
-        ('NAME:("ux исследователь" OR "ux researcher" OR "user researcher")', "UX Researcher"),
-        ('NAME:(пресейл OR presale OR "it консультант" OR "it-консультант")', "IT-Консультант/Presale"),
-    ]
-    
     all_results = []
     
-    for search_query, role_name in roles:
-        print(f"\n⏳ Загружаю: {role_name}...")
-        
-        vacancies = get_vacancies(search_query, area=1, pages=3)
-        
-        if not vacancies:
-            print(f"  ❌ Вакансии не найдены")
-            continue
-        
-        print(f"  ✓ Найдено {len(vacancies)} вакансий, анализирую...")
-        
-        result = analyze_role(vacancies, role_name, max_details=50)
-        result['intp_score'] = calculate_intp_score(result)
-        
-        all_results.append(result)
-        print_role_results(result)
+    # Построчная выгрузка всех проанализированных вакансий
+    with VacancyExporter("hh_intp_vacancies") as exporter:
+        for search_query, role_name in ROLES:
+            print(f"\n⏳ Загружаю: {role_name}...")
+            
+            # Список - вся выдача (страницы дешёвые), деталей - не больше max_details
+            vacancies = get_vacancies(search_query, area=1, pages=MAX_PAGES)
+            
+            if not vacancies:
+                print(f"  ❌ Вакансии не найдены")
+                continue
+            
+            print(f"  ✓ Найдено {len(vacancies)} вакансий, анализирую...")
+            
+            if ADAPTIVE_SAMPLING:
+                # Детали грузятся, пока доли джунов/гибрида и уровень кода не окажутся
+                # уверенно внутри одного уровня INTP_PROFILE (но не больше 50, как раньше)
+                tracker = PrecisionTracker(gate_skills=False, boundaries=profile_boundaries(INTP_PROFILE))
+                result = analyze_role(sample_order(vacancies), role_name, max_details=50,
+                                      tracker=tracker, exporter=exporter,
+                                      dedup=DuplicateFilter())
+            else:
+                result = analyze_role(vacancies, role_name, max_details=50, exporter=exporter,
+                                      dedup=DuplicateFilter())
+            result['intp_score'] = calculate_intp_score(result)
+            append_snapshot(f"intp_{role_name}", result)
+            
+            all_results.append(result)
+            print_role_results(result)
+    
+    print_stats()
     
     # Итоговый рейтинг
     print("\n\n" + "="*70)
@@ -355,7 +417,13 @@ def main():
             'hybrid_remote_pct': r['hybrid_remote'] / r['analyzed'] * 100 if r['analyzed'] else 0,
             'coding_level': r['avg_coding_level'],
             'top_skills': dict(r['skills'].most_common(20)),
+            # Для career_scoring.py: все навыки и средняя зарплата «от»
+            'skills': dict(r['skills']),
+            'avg_salary_from': (sum(s['from'] for s in r['salary']) / len(r['salary'])
+                                if r['salary'] else None),
+            'skill_pairs': skill_associations(r['vacancy_skills'], top=15),
             'experience': dict(r['experience']),
+            'confidence': r['confidence'],
         })
     
     with open('hh_intp_career_analysis.json', 'w', encoding='utf-8') as f:
@@ -0,0 +1,178 @@
+"""
+HeadHunter Near-Duplicate Detector
+Поиск почти одинаковых вакансий (перепосты агентств и крупных работодателей)
+через MinHash-подписи и LSH-бандинг - без попарного сравнения всех вакансий
+"""
+
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 16          # 16 полос по 8 строк: кандидаты начиная с похожести ~0.7
+THRESHOLD = 0.8     # оценка Жаккара, начиная с которой вакансии считаются дублями
+SHINGLE_SIZE = 3    # шинглы из трёх слов
+MIN_TOKENS = 8      # слишком короткие тексты не сравниваем
+
+_PRIME = 4294967311  # простое число > 2^32
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Множество хэшей шинглов (последовательностей из size слов)"""
+    tokens = re.findall(r'\w+', text.lower())
+    if len(tokens) < MIN_TOKENS:
+        return None
+    grams = {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text):
+    """MinHash-подпись текста (NUM_PERM чисел) или None для коротких текстов"""
+    hashes = shingles(text)
+    if hashes is None:
+        return None
+    # (шинглы × перестановки) -> минимум по шинглам
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def signature_list(text):
+    """MinHash-подпись в виде списка (для хранения в JSON-кэше)"""
+    signature = minhash(text)
+    return None if signature is None else signature.tolist()
+
+
+def similarity(sig1, sig2):
+    """Оценка коэффициента Жаккара по двум подписям"""
+    return float(np.mean(sig1 == sig2))
+
+
+class MinHashLSH:
+    """Индекс подписей: кандидаты ищутся по совпадению хотя бы одной полосы"""
+
+    def __init__(self, threshold=THRESHOLD, bands=BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.buckets = defaultdict(list)
+        self.signatures = {}
+
+    def _keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, signature):
+        """Ключи уже добавленных документов, похожих на подпись не меньше threshold"""
+        candidates = set()
+        for key in self._keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        return [c for c in candidates if similarity(signature, self.signatures[c]) >= self.threshold]
+
+    def add(self, doc_key, signature):
+        self.signatures[doc_key] = signature
+        for key in self._keys(signature):
+            self.buckets[key].append(doc_key)
+
+
+def find_duplicate_clusters(texts, threshold=THRESHOLD):
+    """
+    Пакетный режим: texts - {id: очищенное описание}.
+    Возвращает список кластеров (списки id) из двух и более вакансий
+    """
+    index = MinHashLSH(threshold)
+    parent = {}
+
+    def root(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for doc_id, text in texts.items():
+        parent[doc_id] = doc_id
+        signature = minhash(text)
+        if signature is None:
+            continue
+        for match in index.query(signature):
+            parent[root(doc_id)] = root(match)
+        index.add(doc_id, signature)
+
+    clusters = defaultdict(list)
+    for doc_id in parent:
+        clusters[root(doc_id)].append(doc_id)
+    return [ids for ids in clusters.values() if len(ids) > 1]
+
+
+def listing_text(vacancy):
+    """Текст карточки из поиска: название, работодатель и сниппет"""
+    snippet = vacancy.get('snippet') or {}
+    return ' '.join(filter(None, [
+        vacancy.get('name'),
+        (vacancy.get('employer') or {}).get('name'),
+        snippet.get('requirement'),
+        snippet.get('responsibility'),
+    ]))
+
+
+class DuplicateFilter:
+    """
+    Схлопывает дубли на лету во время анализа: учитывается только первая вакансия кластера.
+    skip_listing=True - вакансия пропускается ещё до загрузки деталей, если её карточка
+    из поиска совпадает с карточкой вакансии из подтверждённого кластера (дубли которого
+    уже найдены по описанию). Одного сходства карточек недостаточно: короткие похожие
+    карточки бывают и у разных вакансий
+    """
+
+    def __init__(self, threshold=THRESHOLD, listing_threshold=0.9, skip_listing=True):
+        self.descriptions = MinHashLSH(threshold)
+        self.listings = MinHashLSH(listing_threshold)
+        self.skip_listing = skip_listing
+        self.clusters = defaultdict(list)  # представитель -> id дублей
+        self.representative = {}           # id вакансии -> представитель её кластера по описанию
+        self.skipped_listings = 0
+
+    def is_listing_duplicate(self, vacancy):
+        if not self.skip_listing:
+            return False
+
+        signature = minhash(listing_text(vacancy))
+        if signature is None:
+            return False
+
+        for match in self.listings.query(signature):
+            representative = self.representative.get(match)
+            if representative is not None and self.clusters.get(representative):
+                self.clusters[representative].append(vacancy['id'])
+                self.skipped_listings += 1
+                return True
+
+        self.listings.add(vacancy['id'], signature)
+        return False
+
+    def is_duplicate(self, vacancy_id, signature):
+        """signature - подпись описания (minhash / signature_list), None - не сравнивать"""
+        if signature is None:
+            return False
+        signature = np.asarray(signature, dtype=np.uint64)
+
+        matches = self.descriptions.query(signature)
+        if matches:
+            self.clusters[matches[0]].append(vacancy_id)
+            self.representative[vacancy_id] = matches[0]
+            return True
+
+        self.descriptions.add(vacancy_id, signature)
+        self.representative[vacancy_id] = vacancy_id
+        return False
+
+    def summary(self):
+        duplicates = sum(len(ids) for ids in self.clusters.values())
+        return {
+            'duplicates': duplicates,
+            'clusters': len(self.clusters),
+            'skipped_before_fetch': self.skipped_listings,
+        }
@@ -3,6 +3,7 @@ HeadHunter Risk/AML Analyst Vacancy Parser v2
 Более точный парсер вакансий по рискам и AML
 """
 
+import os
 import requests
 import time
 import re
@@ -10,6 +11,19 @@ from collections import Counter
 from html import unescape
 import json
 
+from detail_cache import cached_extract, extractor_version, fetch_vacancy_details, print_stats
+from employer_enrichment import employer_breakdown, enrich_employers, print_breakdown
+from hh_pagination import fetch_all_pages
+from intp_career_analyzer import check_hybrid_remote, extract_coding_level
+from near_duplicates import DuplicateFilter, signature_list
+from skill_aliases import canonicalize_skills
+from skill_cooccurrence import cooccurrence_filename, save_cooccurrence
+from snapshot_store import append_snapshot, print_trends
+from vacancy_export import VacancyExporter, vacancy_row
+
+# Адрес API (можно подменить на локальный симулятор, см. hh_simulator.py)
+API_URL = os.environ.get("HH_API_URL", "https://api.hh.ru")
+
 def clean_html(html_text):
     if not html_text:
         return ""
@@ -18,11 +32,20 @@ def clean_html(html_text):
     clean = re.sub(r'\s+', ' ', clean).strip()
     return clean
 
-def get_vacancies(text, area=1, pages=10):
+def get_vacancies(text, area=1, pages=10, parallel=True):
+    if parallel:
+        all_vacancies, found = fetch_all_pages(
+            f"{API_URL}/vacancies",
+            {"text": text, "area": area, "per_page": 100},
+            pages
+        )
+        print(f"  Загружено: {len(all_vacancies)} из {found} вакансий")
+        return all_vacancies
+    
     all_vacancies = []
     
     for page in range(pages):
-        url = "https://api.hh.ru/vacancies"
+        url = f"{API_URL}/vacancies"
         params = {
             "text": text,
             "area": area,
@@ -53,11 +76,8 @@ def get_vacancies(text, area=1, pages=10):
     return all_vacancies
 
 def get_vacancy_details(vacancy_id):
-    url = f"https://api.hh.ru/vacancies/{vacancy_id}"
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return fetch_vacancy_details(vacancy_id, API_URL)
     except requests.RequestException:
         return None
 
@@ -139,17 +159,33 @@ def extract_risk_requirements(description):
         if re.search(pattern, description_lower, re.IGNORECASE):
             requirements.append(label)
     
-    return list(set(requirements))
+    # Метки таксономии уже канонические - алиасы к ним не применяются
+    return list(dict.fromkeys(requirements))
+
+def extract_description(vacancy_details):
+    description = clean_html(vacancy_details.get('description', ''))
+    return {
+        'requirements': extract_risk_requirements(description),
+        'work_format': check_hybrid_remote(vacancy_details),
+        'coding_level': extract_coding_level(description),
+        'signature': signature_list(description),
+    }
+
+# Сменилась версия - разбор из кэша пересчитывается
+EXTRACT_VERSION = extractor_version(extract_description, check_hybrid_remote, signature_list)
 
 def extract_key_skills(vacancy_details):
     skills = []
     if vacancy_details and 'key_skills' in vacancy_details:
-        skills = [skill['name'] for skill in vacancy_details['key_skills']]
+        skills = canonicalize_skills(skill['name'] for skill in vacancy_details['key_skills'])
     return skills
 
-def analyze_vacancies(vacancies, max_details=100, filter_titles=None):
+def analyze_vacancies(vacancies, max_details=100, filter_titles=None, exporter=None, dataset=None, dedup=None):
     all_skills = []
     all_requirements = []
+    vacancy_skills = []
+    vacancy_requirements = []
+    vacancy_employers = []
     salary_data = []
     experience_data = []
     titles = []
@@ -166,22 +202,45 @@ def analyze_vacancies(vacancies, max_details=100, filter_titles=None):
             if not any(f in title_lower for f in filter_titles):
                 continue
         
+        # Карточка совпадает с уже учтённой - детали не загружаем
+        if dedup and dedup.is_listing_duplicate(vacancy):
+            continue
+        
         count += 1
         
         if count % 20 == 0:
             print(f"  Обработано: {count}/{max_details}")
         
-        titles.append(vacancy['name'])
-        
         details = get_vacancy_details(vacancy['id'])
         
+        extracted = None
+        if details:
+            extracted = cached_extract(vacancy['id'], 'risk', lambda: extract_description(details), EXTRACT_VERSION)
+            
+            # Почти такое же описание уже учтено - перепост не считаем
+            if dedup and dedup.is_duplicate(vacancy['id'], extracted.get('signature')):
+                count -= 1
+                time.sleep(0.1)
+                continue
+        
+        titles.append(vacancy['name'])
+        
         if details:
             skills = extract_key_skills(details)
             all_skills.extend(skills)
+            vacancy_skills.append(skills)
             
-            description = clean_html(details.get('description', ''))
-            requirements = extract_risk_requirements(description)
+            requirements = extracted['requirements']
             all_requirements.extend(requirements)
+            vacancy_requirements.append(requirements)
+            vacancy_employers.append((vacancy.get('employer') or {}).get('id'))
+            
+            if exporter:
+                exporter.write(vacancy_row(
+                    dataset, vacancy, details, requirements, skills,
+                    work_format=extracted['work_format'],
+                    coding_level=extracted['coding_level']
+                ))
             
             salary = details.get('salary')
             if salary and salary.get('from'):
@@ -203,6 +262,10 @@ def analyze_vacancies(vacancies, max_details=100, filter_titles=None):
         'salary': salary_data,
         'experience': Counter(experience_data),
         'titles': Counter(titles),
+        'vacancy_skills': vacancy_skills,
+        'vacancy_requirements': vacancy_requirements,
+        'vacancy_employers': vacancy_employers,
+        'duplicates': dedup.summary() if dedup else None,
         'total_analyzed': count
     }
 
@@ -211,6 +274,9 @@ def print_results(analysis, name):
     print(f"РЕЗУЛЬТАТЫ: {name}")
     print("="*70)
     print(f"Проанализировано вакансий: {analysis['total_analyzed']}")
+    if analysis.get('duplicates'):
+        d = analysis['duplicates']
+        print(f"Дубли (перепосты): {d['duplicates']}, не загружено по карточке: {d['skipped_before_fetch']}")
     
     # Названия
     print("\n--- ПОПУЛЯРНЫЕ НАЗВАНИЯ ВАКАНСИЙ ---")
@@ -260,77 +326,80 @@ def save_results(analysis, filename):
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
     print(f"\nСохранено: {filename}")
+    save_cooccurrence(analysis['vacancy_skills'], cooccurrence_filename(filename))
 
 def main():
     all_results = {}
     
-    # 1. AML/Compliance специалисты
-    print("\n" + "="*70)
-    print("ПОИСК #1: AML / Compliance / ПОД/ФТ")
-    print("="*70)
-    
-    vacancies1 = get_vacancies(
-        text='NAME:(AML OR "ПОД/ФТ" OR комплаенс OR compliance OR "финансовый мониторинг")',
-        area=1,
-        pages=5
-    )
-    
-    if vacancies1:
-        analysis1 = analyze_vacancies(vacancies1, max_details=80)
-        print_results(analysis1, "AML / Compliance")
-        save_results(analysis1, "hh_aml_results.json")
-        all_results['aml'] = analysis1
-    
-    # 2. Риск-аналитики
-    print("\n" + "="*70)
-    print("ПОИСК #2: Риск-аналитик / Риск-менеджер")
-    print("="*70)
-    
-    vacancies2 = get_vacancies(
-        text='NAME:(риск аналитик OR риск-аналитик OR риск-менеджер OR "risk analyst" OR "risk manager")',
-        area=1,
-        pages=5
-    )
-    
-    if vacancies2:
-        analysis2 = analyze_vacancies(vacancies2, max_details=80)
-        print_results(analysis2, "Риск-аналитик")
-        save_results(analysis2, "hh_risk_analyst_results.json")
-        all_results['risk'] = analysis2
-    
-    # 3. Антифрод
-    print("\n" + "="*70)
-    print("ПОИСК #3: Антифрод / Fraud Analyst")
-    print("="*70)
-    
-    vacancies3 = get_vacancies(
-        text='NAME:(антифрод OR fraud OR фрод)',
-        area=1,
-        pages=5
-    )
-    
-    if vacancies3:
-        analysis3 = analyze_vacancies(vacancies3, max_details=50)
-        print_results(analysis3, "Антифрод")
-        save_results(analysis3, "hh_antifraud_results.json")
-        all_results['antifraud'] = analysis3
-    
-    # 4. Кредитный риск
-    print("\n" + "="*70)
-    print("ПОИСК #4: Кредитный риск / Скоринг")
-    print("="*70)
-    
-    vacancies4 = get_vacancies(
-        text='NAME:("кредитный риск" OR скоринг OR scoring OR "credit risk")',
-        area=1,
-        pages=5
-    )
-    
-    if vacancies4:
-        analysis4 = analyze_vacancies(vacancies4, max_details=50)
-        print_results(analysis4, "Кредитный риск")
-        save_results(analysis4, "hh_credit_risk_results.json")
-        all_results['credit_risk'] = analysis4
+    # Построчная выгрузка всех проанализированных вакансий
+    with VacancyExporter("hh_risk_vacancies") as exporter:
+        # 1. AML/Compliance специалисты
+        print("\n" + "="*70)
+        print("ПОИСК #1: AML / Compliance / ПОД/ФТ")
+        print("="*70)
+        
+        vacancies1 = get_vacancies(
+            text='NAME:(AML OR "ПОД/ФТ" OR комплаенс OR compliance OR "финансовый мониторинг")',
+            area=1,
+            pages=5
+        )
+        
+        if vacancies1:
+            analysis1 = analyze_vacancies(vacancies1, max_details=80, exporter=exporter, dataset='aml', dedup=DuplicateFilter())
+            print_results(analysis1, "AML / Compliance")
+            save_results(analysis1, "hh_aml_results.json")
+            all_results['aml'] = analysis1
+        
+        # 2. Риск-аналитики
+        print("\n" + "="*70)
+        print("ПОИСК #2: Риск-аналитик / Риск-менеджер")
+        print("="*70)
+        
+        vacancies2 = get_vacancies(
+            text='NAME:(риск аналитик OR риск-аналитик OR риск-менеджер OR "risk analyst" OR "risk manager")',
+            area=1,
+            pages=5
+        )
+        
+        if vacancies2:
+            analysis2 = analyze_vacancies(vacancies2, max_details=80, exporter=exporter, dataset='risk', dedup=DuplicateFilter())
+            print_results(analysis2, "Риск-аналитик")
+            save_results(analysis2, "hh_risk_analyst_results.json")
+            all_results['risk'] = analysis2
+        
+        # 3. Антифрод
+        print("\n" + "="*70)
+        print("ПОИСК #3: Антифрод / Fraud Analyst")
+        print("="*70)
+        
+        vacancies3 = get_vacancies(
+            text='NAME:(антифрод OR fraud OR фрод)',
+            area=1,
+            pages=5
+        )
+        
+        if vacancies3:
+            analysis3 = analyze_vacancies(vacancies3, max_details=50, exporter=exporter, dataset='antifraud', dedup=DuplicateFilter())
+            print_results(analysis3, "Антифрод")
+            save_results(analysis3, "hh_antifraud_results.json")
+            all_results['antifraud'] = analysis3
+        
+        # 4. Кредитный риск
+        print("\n" + "="*70)
+        print("ПОИСК #4: Кредитный риск / Скоринг")
+        print("="*70)
+        
+        vacancies4 = get_vacancies(
+            text='NAME:("кредитный риск" OR скоринг OR scoring OR "credit risk")',
+            area=1,
+            pages=5
+        )
+        
+        if vacancies4:
+            analysis4 = analyze_vacancies(vacancies4, max_details=50, exporter=exporter, dataset='credit_risk', dedup=DuplicateFilter())
+            print_results(analysis4, "Кредитный риск")
+            save_results(analysis4, "hh_credit_risk_results.json")
+            all_results['credit_risk'] = analysis4
     
     # Общая статистика
     print("\n\n" + "="*70)
@@ -339,10 +408,12 @@ def main():
     
     combined_skills = Counter()
     combined_requirements = Counter()
+    combined_vacancy_skills = []
     total_count = 0
     
     for name, analysis in all_results.items():
         combined_skills.update(analysis['skills'])
+        combined_vacancy_skills.extend(analysis['vacancy_skills'])
         combined_requirements.update(analysis['requirements'])
         total_count += analysis['total_analyzed']
     
@@ -369,6 +440,33 @@ def main():
         json.dump(combined_results, f, ensure_ascii=False, indent=2)
     
     print("\n\nСохранено: hh_risk_combined_results.json")
+    
+    # Работодатели: каждый уникальный id запрашивается один раз (с кэшем на диске)
+    print("\n\n" + "="*70)
+    print("РАБОТОДАТЕЛИ ПО НАПРАВЛЕНИЯМ")
+    print("="*70)
+    
+    employers = enrich_employers(
+        emp_id for analysis in all_results.values() for emp_id in analysis['vacancy_employers']
+    )
+    
+    employer_results = {}
+    for name, analysis in all_results.items():
+        breakdown = employer_breakdown(analysis['vacancy_employers'], analysis['vacancy_requirements'], employers)
+        print_breakdown(breakdown, name)
+        employer_results[name] = breakdown
+    
+    with open('hh_risk_employers.json', 'w', encoding='utf-8') as f:
+        json.dump(employer_results, f, ensure_ascii=False, indent=2)
+    
+    print("\nСохранено: hh_risk_employers.json")
+    
+    # История запусков по каждому направлению
+    for name, analysis in all_results.items():
+        print_trends(append_snapshot(f"risk_{name}", analysis))
+    save_cooccurrence(combined_vacancy_skills, 'hh_risk_combined_results_cooccurrence.json')
+    
+    print_stats()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,130 @@
+"""
+HeadHunter Skill Canonicalizer
+Приведение названий навыков к единому виду (MS Excel / Excel / Microsoft Excel -> Excel)
+"""
+
+import re
+from difflib import get_close_matches
+from functools import lru_cache
+
+# Каноническое название -> варианты написания того же навыка, которые встречаются в key_skills.
+# Только варианты написания и переводы: разные по смыслу навыки не объединяются
+SKILL_ALIASES = {
+    # Офисные инструменты
+    'Excel': ['MS Excel', 'Microsoft Excel', 'Эксель', 'Excel (продвинутый)', 'Продвинутый пользователь Excel'],
+    'Word': ['MS Word', 'Microsoft Word'],
+    'PowerPoint': ['MS PowerPoint', 'Microsoft PowerPoint', 'Power Point'],
+    'MS Office': ['Microsoft Office', 'MS Office', 'Пакет MS Office'],
+    'Google Docs': ['Google Документы'],
+    'Google Sheets': ['Google Таблицы'],
+    'Пользователь ПК': ['Уверенный пользователь ПК', 'Опытный пользователь ПК'],
+
+    # Таск-трекеры и документация
+    'Jira': ['Atlassian Jira', 'JIRA'],
+    'Confluence': ['Atlassian Confluence'],
+    'YouTrack': ['Youtrack'],
+    'Miro': ['Miro Board'],
+    'Draw.io': ['drawio', 'diagrams.net'],
+
+    # Нотации и аналитика
+    'BPMN': ['BPMN 2.0', 'Нотация BPMN'],
+    'UML': ['Нотация UML'],
+    'Use Case': ['Use case', 'Use-case', 'Use Cases', 'Usecase'],
+    'User Story': ['User Stories', 'User-story', 'Userstory'],
+    'Техническое задание': ['ТЗ', 'Разработка технических заданий', 'Написание технических заданий',
+                            'Составление технических заданий', 'Техническое Задание'],
+    'Бизнес-анализ': ['Бизнес анализ', 'Business Analysis'],
+    'Системный анализ': ['System Analysis'],
+    'Моделирование бизнес-процессов': ['Моделирование бизнес процессов'],
+    'Описание бизнес-процессов': ['Описание бизнес процессов'],
+    'Анализ бизнес-процессов': ['Анализ бизнес процессов'],
+    'Оптимизация бизнес-процессов': ['Оптимизация бизнес процессов'],
+    'Автоматизация бизнес-процессов': ['Автоматизация бизнес процессов'],
+    'Анализ данных': ['Data Analysis'],
+    'Аналитическое мышление': ['Аналитический склад ума', 'Analytical Thinking'],
+
+    # Базы данных и интеграции
+    'SQL': ['Язык запросов SQL', 'SQL-запросы'],
+    'MS SQL': ['MSSQL', 'MS SQL Server', 'Microsoft SQL Server'],
+    'PostgreSQL': ['Postgres', 'Postgresql', 'PostgresQL'],
+    'ClickHouse': ['Clickhouse'],
+    'REST API': ['REST', 'RESTful API', 'Rest Api', 'RESTful'],
+    'Kafka': ['Apache Kafka'],
+    'Power BI': ['PowerBI', 'MS Power BI', 'Microsoft Power BI', 'Power Bi'],
+    '1С': ['1С: Предприятие 8', '1С: Предприятие', '1C', '1С:Предприятие'],
+
+    # Языки
+    'Английский язык': ['English', 'Английский'],
+
+    # Коммуникация
+    'Деловая коммуникация': ['Деловое общение', 'Business Communication'],
+    'Деловая переписка': ['Ведение переписки'],
+    'Переговоры': ['Навыки переговоров', 'Ведение переговоров', 'Negotiation skills'],
+    'Презентации': ['Навыки презентации', 'Подготовка презентаций'],
+    'Коммуникабельность': ['Коммуникативные навыки'],
+    'Работа в команде': ['Умение работать в коллективе', 'Умение работать в команде', 'Teamwork'],
+    'Управление командой': ['Руководство коллективом', 'Team management'],
+
+    # Риски и комплаенс
+    'Комплаенс': ['Compliance'],
+    'ПОД/ФТ': ['ПОД ФТ'],
+    'Антифрод': ['Anti-fraud', 'Antifraud'],
+    'Управление рисками': ['Риск-менеджмент', 'Risk management'],
+    'FinTech': ['Fintech', 'Финтех'],
+    'Беттинг': ['Betting'],
+}
+
+# Для нечёткого поиска: не сопоставляем слишком короткие строки (SQL / SAS / SAP)
+FUZZY_MIN_LENGTH = 6
+FUZZY_CUTOFF = 0.9
+
+
+def normalize_skill_key(name):
+    """Ключ для сравнения: регистр, ё/е, дефисы и лишние пробелы не важны"""
+    key = name.casefold().replace('ё', 'е')
+    key = re.sub(r'[\s\-_–—]+', ' ', key)
+    return key.strip(' .,;:')
+
+
+def build_alias_index(aliases=SKILL_ALIASES):
+    """Предвычисляет словарь нормализованный вариант -> каноническое название"""
+    index = {}
+    for canonical, variants in aliases.items():
+        index[normalize_skill_key(canonical)] = canonical
+        for variant in variants:
+            index[normalize_skill_key(variant)] = canonical
+    return index
+
+
+ALIAS_INDEX = build_alias_index()
+_ALIAS_KEYS = list(ALIAS_INDEX)
+
+
+@lru_cache(maxsize=None)
+def canonicalize_skill(name):
+    """
+    Возвращает каноническое название навыка.
+    Сначала точный поиск по словарю алиасов, нечёткий поиск - только при промахе
+    (результат кэшируется, поэтому каждое новое написание сравнивается один раз)
+    """
+    if not name:
+        return name
+
+    name = re.sub(r'\s+', ' ', name).strip()
+    key = normalize_skill_key(name)
+
+    canonical = ALIAS_INDEX.get(key)
+    if canonical:
+        return canonical
+
+    if len(key) >= FUZZY_MIN_LENGTH:
+        match = get_close_matches(key, _ALIAS_KEYS, n=1, cutoff=FUZZY_CUTOFF)
+        if match:
+            return ALIAS_INDEX[match[0]]
+
+    return name
+
+
+def canonicalize_skills(names):
+    """Канонизирует список навыков одной вакансии и убирает повторы"""
+    return list(dict.fromkeys(canonicalize_skill(name) for name in names if name))
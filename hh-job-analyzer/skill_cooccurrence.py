@@ -0,0 +1,128 @@
+"""
+HeadHunter Skill Co-occurrence Analyzer
+Совместная встречаемость навыков: support, confidence, lift и PMI
+"""
+
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+
+def build_skill_matrix(vacancy_skills):
+    """
+    Строит разреженную матрицу вакансия × навык (1 - навык указан в вакансии)
+    vacancy_skills - список списков key_skills по каждой вакансии
+    """
+    vocab = {}
+    rows = []
+    cols = []
+
+    for row, skills in enumerate(vacancy_skills):
+        for skill in set(skills):
+            rows.append(row)
+            cols.append(vocab.setdefault(skill, len(vocab)))
+
+    data = np.ones(len(rows), dtype=np.int32)
+    matrix = sparse.csr_matrix(
+        (data, (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))),
+        shape=(len(vacancy_skills), len(vocab))
+    )
+
+    names = [None] * len(vocab)
+    for skill, col in vocab.items():
+        names[col] = skill
+    return matrix, names
+
+
+def cooccurrence_counts(vacancy_skills):
+    """
+    Матрица навык × навык (число вакансий, где оба навыка указаны вместе), частоты навыков,
+    их названия и число вакансий. Считается один раз и передаётся в skill_associations
+    и skill_neighbors через cooccurrence=
+    """
+    matrix, names = build_skill_matrix(vacancy_skills)
+    counts = np.asarray(matrix.sum(axis=0)).ravel()
+    co = (matrix.T @ matrix).tocsr()
+    return co, counts, names, matrix.shape[0]
+
+
+def skill_associations(vacancy_skills, min_count=2, top=50, cooccurrence=None):
+    """
+    Находит пары навыков, которые чаще встречаются вместе, чем по отдельности.
+    Сортировка по lift, при равенстве - по числу совместных вакансий
+    """
+    co, counts, names, total = cooccurrence or cooccurrence_counts(vacancy_skills)
+    if total == 0 or not names:
+        return []
+
+    co = co.tocoo()
+    mask = (co.row < co.col) & (co.data >= min_count)
+    left, right, together = co.row[mask], co.col[mask], co.data[mask].astype(np.float64)
+
+    lift = together * total / (counts[left] * counts[right])
+    pmi = np.log2(lift)
+    confidence = together / counts[left]
+
+    order = np.lexsort((-together, -lift))[:top]
+
+    return [
+        {
+            'skills': [names[left[k]], names[right[k]]],
+            'count': int(together[k]),
+            'support': round(float(together[k] / total), 4),
+            'confidence': round(float(confidence[k]), 4),
+            'lift': round(float(lift[k]), 3),
+            'pmi': round(float(pmi[k]), 3),
+        }
+        for k in order
+    ]
+
+
+def skill_neighbors(vacancy_skills, top_skills=20, per_skill=5, min_count=2, cooccurrence=None):
+    """Для самых частых навыков возвращает навыки-«спутники» с наибольшим lift"""
+    co, counts, names, total = cooccurrence or cooccurrence_counts(vacancy_skills)
+    if total == 0 or not names:
+        return {}
+
+    neighbors = {}
+    for col in np.argsort(-counts, kind='stable')[:top_skills]:
+        start, end = co.indptr[col], co.indptr[col + 1]
+        other = co.indices[start:end]
+        together = co.data[start:end]
+
+        mask = (other != col) & (together >= min_count)
+        other, together = other[mask], together[mask]
+        if not len(other):
+            continue
+
+        lift = together * total / (counts[col] * counts[other])
+        order = np.lexsort((-together, -lift))[:per_skill]
+        neighbors[names[col]] = {
+            names[other[k]]: round(float(lift[k]), 3) for k in order
+        }
+
+    return neighbors
+
+
+def cooccurrence_filename(filename):
+    """hh_analysis_results.json -> hh_analysis_results_cooccurrence.json"""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_cooccurrence{ext or '.json'}"
+
+
+def save_cooccurrence(vacancy_skills, filename, top=50):
+    """Сохраняет пары навыков и «спутников» рядом с основными результатами"""
+    cooccurrence = cooccurrence_counts(vacancy_skills)
+    results = {
+        'pairs': skill_associations(vacancy_skills, top=top, cooccurrence=cooccurrence),
+        'neighbors': skill_neighbors(vacancy_skills, cooccurrence=cooccurrence),
+        'total_analyzed': len(vacancy_skills)
+    }
+
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(f"Совместная встречаемость навыков сохранена в {filename}")
+    return results
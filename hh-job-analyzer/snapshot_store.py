@@ -0,0 +1,207 @@
+"""
+HeadHunter Snapshot Store
+История запусков: компактное хранение агрегатов и тренды (неделя к неделе, растущие/падающие навыки)
+"""
+
+import json
+import os
+import re
+import time
+from statistics import median
+
+import numpy as np
+
+HISTORY_DIR = "history"
+
+# Одна строка истории: время запуска, id метрики, значение (16 байт)
+ROW_DTYPE = np.dtype([('ts', '<i8'), ('key', '<i4'), ('value', '<f4')])
+
+WEEK = 7 * 24 * 3600
+EWMA_ALPHA = 0.3
+EWMA_EPSILON = 1e-3  # доля навыка ниже 0.1% - навык пропал, его EWMA больше не храним
+
+
+def dataset_dir(dataset, root=HISTORY_DIR):
+    """Папка истории для набора данных (имя безопасно для файловой системы)"""
+    slug = re.sub(r'[^\w.-]+', '_', dataset).strip('_') or 'default'
+    return os.path.join(root, slug)
+
+
+def metrics_from_analysis(analysis):
+    """
+    Сворачивает результат анализа в плоский словарь метрик.
+    Навыки и требования - доля вакансий, зарплата - медиана и среднее «от» в рублях
+    """
+    total = analysis.get('total_analyzed', analysis.get('analyzed', 0))
+    metrics = {'total_analyzed': float(total)}
+
+    for kind in ('skills', 'requirements'):
+        for name, count in analysis.get(kind, {}).items():
+            metrics[f"{kind}:{name}"] = count / total if total else 0.0
+
+    from_vals = [s['from'] for s in analysis.get('salary', [])
+                 if s.get('from') and s.get('currency', 'RUR') == 'RUR']
+    if from_vals:
+        metrics['salary:median_from'] = float(median(from_vals))
+        metrics['salary:avg_from'] = sum(from_vals) / len(from_vals)
+
+    for key in ('intp_score', 'avg_coding_level'):
+        if key in analysis:
+            metrics[key] = float(analysis[key])
+
+    return metrics
+
+
+def _metric_value(metrics, name):
+    """Значение метрики снимка; отсутствующая доля навыка/требования - 0, остальные - None"""
+    if name in metrics:
+        return metrics[name]
+    return 0.0 if name.startswith(('skills:', 'requirements:')) else None
+
+
+def _load_state(path):
+    if not os.path.exists(path):
+        return {'keys': {}, 'recent': [], 'ewma': {}, 'snapshots': 0}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_state(state, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def append_snapshot(dataset, analysis, timestamp=None, root=HISTORY_DIR):
+    """
+    Дописывает агрегаты запуска в историю и обновляет тренды.
+    Читается только небольшой state.json, вся история не перечитывается
+    """
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    folder = dataset_dir(dataset, root)
+    os.makedirs(folder, exist_ok=True)
+
+    state_path = os.path.join(folder, 'state.json')
+    state = _load_state(state_path)
+    metrics = metrics_from_analysis(analysis)
+
+    keys = state['keys']
+    known = len(keys)
+    rows = np.empty(len(metrics), dtype=ROW_DTYPE)
+    for i, (name, value) in enumerate(metrics.items()):
+        rows[i] = (timestamp, keys.setdefault(name, len(keys)), value)
+
+    # Новые id метрик фиксируются до записи строк: иначе после сбоя между записью
+    # values.bin и state.json следующий запуск выдал бы те же id другим метрикам
+    if len(keys) > known:
+        _save_state(state, state_path)
+
+    with open(os.path.join(folder, 'values.bin'), 'ab') as f:
+        rows.tofile(f)
+
+    # Скользящее среднее - основа для «растущих/падающих» метрик.
+    # Пропавший навык/требование - доля 0; остальные метрики (например, зарплата,
+    # если в запуске не было рублёвых вакансий) просто не обновляются
+    ewma = state['ewma']
+    for name in set(ewma) | set(metrics):
+        value = _metric_value(metrics, name)
+        if value is None:
+            continue
+        ewma[name] = value if name not in ewma else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * ewma[name]
+        # Иначе state.json растёт с каждым когда-либо встреченным названием навыка
+        if name not in metrics and ewma[name] < EWMA_EPSILON:
+            del ewma[name]
+
+    # Недавние снимки храним ровно настолько, чтобы найти точку «неделю назад»
+    recent = state['recent'] + [{'ts': timestamp, 'metrics': metrics}]
+    while len(recent) > 2 and recent[1]['ts'] <= timestamp - WEEK:
+        recent.pop(0)
+    state['recent'] = recent
+    state['snapshots'] += 1
+
+    _save_state(state, state_path)
+    return trend_report(dataset, root, state=state)
+
+
+def trend_report(dataset, root=HISTORY_DIR, state=None, top=10):
+    """Изменения неделя к неделе и навыки с наибольшим ростом/падением"""
+    if state is None:
+        state = _load_state(os.path.join(dataset_dir(dataset, root), 'state.json'))
+    if not state['recent']:
+        return None
+
+    current = state['recent'][-1]
+    # Самый свежий снимок, сделанный не позже чем неделю назад
+    baseline = state['recent'][0]
+    for snapshot in state['recent']:
+        if snapshot['ts'] <= current['ts'] - WEEK:
+            baseline = snapshot
+
+    # По объединению метрик: навык, пропавший из текущего запуска, тоже «падающий»
+    deltas = {}
+    for name in list(current['metrics']) + [n for n in baseline['metrics'] if n not in current['metrics']]:
+        value = _metric_value(current['metrics'], name)
+        previous = _metric_value(baseline['metrics'], name)
+        if value is not None and previous is not None:
+            deltas[name] = value - previous
+
+    skill_deltas = sorted(
+        ((name, delta) for name, delta in deltas.items() if name.startswith('skills:')),
+        key=lambda item: item[1]
+    )
+
+    return {
+        'dataset': dataset,
+        'snapshots': state['snapshots'],
+        'current_ts': current['ts'],
+        'baseline_ts': baseline['ts'],
+        'week_over_week': {name: delta for name, delta in deltas.items() if not name.startswith(('skills:', 'requirements:'))},
+        'rising_skills': [(name[7:], round(d, 4)) for name, d in reversed(skill_deltas[-top:]) if d > 0],
+        'falling_skills': [(name[7:], round(d, 4)) for name, d in skill_deltas[:top] if d < 0],
+        'ewma': {name: value for name, value in state['ewma'].items() if not name.startswith(('skills:', 'requirements:'))},
+    }
+
+
+def load_series(dataset, metric, root=HISTORY_DIR):
+    """Полный временной ряд одной метрики: (timestamps, values)"""
+    folder = dataset_dir(dataset, root)
+    state = _load_state(os.path.join(folder, 'state.json'))
+    key = state['keys'].get(metric)
+    path = os.path.join(folder, 'values.bin')
+    if key is None or not os.path.exists(path):
+        return np.array([], dtype='<i8'), np.array([], dtype='<f4')
+
+    rows = np.memmap(path, dtype=ROW_DTYPE, mode='r')
+    selected = rows[rows['key'] == key]
+    return np.array(selected['ts']), np.array(selected['value'])
+
+
+def print_trends(report):
+    """Выводит тренды по сравнению с запуском неделю назад"""
+    if not report:
+        return
+
+    print("\n" + "-"*60)
+    print(f"ТРЕНДЫ: {report['dataset']} (снимков в истории: {report['snapshots']})")
+    print("-"*60)
+
+    if report['current_ts'] == report['baseline_ts']:
+        print("Первый снимок - сравнивать пока не с чем")
+        return
+
+    days = (report['current_ts'] - report['baseline_ts']) / 86400
+    print(f"Сравнение с запуском {days:.0f} дн. назад")
+
+    for name, delta in report['week_over_week'].items():
+        print(f"  {name:40} | {delta:+,.1f}")
+
+    if report['rising_skills']:
+        print("\n  Растущие навыки (доля вакансий):")
+        for skill, delta in report['rising_skills']:
+            print(f"    ▲ {skill:38} | {delta * 100:+.1f} п.п.")
+
+    if report['falling_skills']:
+        print("\n  Падающие навыки (доля вакансий):")
+        for skill, delta in report['falling_skills']:
+            print(f"    ▼ {skill:38} | {delta * 100:+.1f} п.п.")
@@ -3,6 +3,7 @@ HeadHunter Vacancy Parser & Requirements Analyzer
 Парсер вакансий HeadHunter с анализом требований
 """
 
+import os
 import requests
 import time
 import re
@@ -10,6 +11,22 @@ from collections import Counter
 from html import unescape
 import json
 
+from adaptive_sampling import PrecisionTracker, sample_order
+from detail_cache import cached_extract, extractor_version, fetch_vacancy_details, print_stats
+from hh_pagination import fetch_all_pages
+from intp_career_analyzer import check_hybrid_remote, extract_coding_level
+from near_duplicates import DuplicateFilter, signature_list
+from skill_aliases import canonicalize_skills
+from skill_cooccurrence import cooccurrence_filename, save_cooccurrence
+from snapshot_store import append_snapshot, print_trends
+from vacancy_export import VacancyExporter, vacancy_row
+
+# Адрес API (можно подменить на локальный симулятор, см. hh_simulator.py)
+API_URL = os.environ.get("HH_API_URL", "https://api.hh.ru")
+
+# Случайная выборка по всей выдаче с остановкой по точности вместо первых N вакансий
+ADAPTIVE_SAMPLING = True
+
 def clean_html(html_text):
     """Удаляет HTML теги и очищает текст"""
     if not html_text:
@@ -22,15 +39,25 @@ def clean_html(html_text):
     clean = re.sub(r'\s+', ' ', clean).strip()
     return clean
 
-def get_vacancies(text="Системный аналитик", area=1, pages=10):
+def get_vacancies(text="Системный аналитик", area=1, pages=10, parallel=True):
     """
     Получает вакансии с HeadHunter API
     area=1 - Москва
+    parallel=True - число страниц берётся из первого ответа, остальные грузятся параллельно
     """
+    if parallel:
+        all_vacancies, found = fetch_all_pages(
+            f"{API_URL}/vacancies",
+            {"text": text, "area": area, "per_page": 100},
+            pages
+        )
+        print(f"\nВсего найдено вакансий: {len(all_vacancies)} (по запросу: {found})")
+        return all_vacancies
+    
     all_vacancies = []
     
     for page in range(pages):
-        url = "https://api.hh.ru/vacancies"
+        url = f"{API_URL}/vacancies"
         params = {
             "text": text,
             "area": area,
@@ -63,87 +90,110 @@ def get_vacancies(text="Системный аналитик", area=1, pages=10):
     return all_vacancies
 
 def get_vacancy_details(vacancy_id):
-    """Получает детальную информацию о вакансии"""
-    url = f"https://api.hh.ru/vacancies/{vacancy_id}"
-    
+    """Получает детальную информацию о вакансии (условный запрос, неизменённые - из кэша)"""
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return fetch_vacancy_details(vacancy_id, API_URL)
     except requests.RequestException as e:
         print(f"Ошибка при получении вакансии {vacancy_id}: {e}")
         return None
 
 def extract_requirements(description):
-    """Извлекает требования из описания вакансии"""
+    """Извлекает требования из описания вакансии (паттерн -> каноническая метка)"""
     requirements = []
     
     # Ключевые слова и навыки для поиска
     keywords = [
         # Методологии и подходы
-        r'agile', r'scrum', r'kanban', r'waterfall', r'lean',
+        (r'agile', 'Agile'), (r'scrum', 'Scrum'), (r'kanban', 'Kanban'),
+        (r'waterfall', 'Waterfall'), (r'lean', 'Lean'),
         # Нотации и документация
-        r'bpmn', r'uml', r'use[- ]?case', r'user[- ]?story', r'user stories',
-        r'техническ\w* задани\w*', r'ТЗ', r'SRS', r'BRD', r'FRD',
-        r'swagger', r'openapi', r'api[- ]?документ\w*',
+        (r'bpmn', 'BPMN'), (r'uml', 'UML'), (r'use[- ]?case', 'Use Case'),
+        (r'user[- ]?story', 'User Story'), (r'user stories', 'User Story'),
+        (r'техническ\w* задани\w*', 'Техническое задание'), (r'ТЗ', 'Техническое задание'),
+        (r'SRS', 'SRS'), (r'BRD', 'BRD'), (r'FRD', 'FRD'),
+        (r'swagger', 'Swagger'), (r'openapi', 'OpenAPI'), (r'api[- ]?документ\w*', 'API-документация'),
         # Инструменты
-        r'jira', r'confluence', r'miro', r'figma', r'visio', r'draw\.io', r'lucidchart',
-        r'notion', r'trello', r'asana', r'youtrack',
-        r'postman', r'insomnia', r'soapui',
-        r'git', r'gitlab', r'github', r'bitbucket',
+        (r'jira', 'Jira'), (r'confluence', 'Confluence'), (r'miro', 'Miro'), (r'figma', 'Figma'),
+        (r'visio', 'Visio'), (r'draw\.io', 'Draw.io'), (r'lucidchart', 'Lucidchart'),
+        (r'notion', 'Notion'), (r'trello', 'Trello'), (r'asana', 'Asana'), (r'youtrack', 'YouTrack'),
+        (r'postman', 'Postman'), (r'insomnia', 'Insomnia'), (r'soapui', 'SoapUI'),
+        (r'git', 'Git'), (r'gitlab', 'GitLab'), (r'github', 'GitHub'), (r'bitbucket', 'Bitbucket'),
         # Базы данных и SQL
-        r'sql', r'postgresql', r'mysql', r'oracle', r'mongodb', r'redis',
-        r'clickhouse', r'elasticsearch',
+        (r'sql', 'SQL'), (r'postgresql', 'PostgreSQL'), (r'mysql', 'MySQL'), (r'oracle', 'Oracle'),
+        (r'mongodb', 'MongoDB'), (r'redis', 'Redis'),
+        (r'clickhouse', 'ClickHouse'), (r'elasticsearch', 'Elasticsearch'),
         # Интеграции
-        r'rest\s?api', r'soap', r'graphql', r'grpc', r'websocket',
-        r'kafka', r'rabbitmq', r'activemq',
-        r'json', r'xml', r'yaml',
+        (r'rest\s?api', 'REST API'), (r'soap', 'SOAP'), (r'graphql', 'GraphQL'),
+        (r'grpc', 'gRPC'), (r'websocket', 'WebSocket'),
+        (r'kafka', 'Kafka'), (r'rabbitmq', 'RabbitMQ'), (r'activemq', 'ActiveMQ'),
+        (r'json', 'JSON'), (r'xml', 'XML'), (r'yaml', 'YAML'),
         # Навыки
-        r'python', r'java', r'javascript', r'c#', r'php',
-        r'аналитическ\w* мышлен\w*', r'системн\w* мышлен\w*',
-        r'коммуникаб\w*', r'коммуникатив\w*',
-        r'презентац\w*', r'переговор\w*',
-        r'английск\w* язык\w*', r'english',
+        (r'python', 'Python'), (r'java', 'Java'), (r'javascript', 'JavaScript'),
+        (r'c#', 'C#'), (r'php', 'PHP'),
+        (r'аналитическ\w* мышлен\w*', 'Аналитическое мышление'),
+        (r'системн\w* мышлен\w*', 'Системное мышление'),
+        (r'коммуникаб\w*', 'Коммуникабельность'), (r'коммуникатив\w*', 'Коммуникабельность'),
+        (r'презентац\w*', 'Презентации'), (r'переговор\w*', 'Переговоры'),
+        (r'английск\w* язык\w*', 'Английский язык'), (r'english', 'Английский язык'),
         # Области знаний
-        r'e-commerce', r'fintech', r'банк\w*', r'финанс\w*',
-        r'erp', r'crm', r'1с', r'sap',
-        r'bi', r'power\s?bi', r'tableau', r'superset',
-        r'data\s?warehouse', r'dwh', r'etl',
-        r'machine\s?learning', r'ml', r'data\s?science',
-        r'микросервис\w*', r'microservice',
-        r'облачн\w*', r'cloud', r'aws', r'azure', r'gcp',
-        r'docker', r'kubernetes', r'k8s',
+        (r'e-commerce', 'E-commerce'), (r'fintech', 'FinTech'), (r'банк\w*', 'Банки'), (r'финанс\w*', 'Финансы'),
+        (r'erp', 'ERP'), (r'crm', 'CRM'), (r'1с', '1С'), (r'sap', 'SAP'),
+        (r'bi', 'BI'), (r'power\s?bi', 'Power BI'), (r'tableau', 'Tableau'), (r'superset', 'Superset'),
+        (r'data\s?warehouse', 'DWH'), (r'dwh', 'DWH'), (r'etl', 'ETL'),
+        (r'machine\s?learning', 'ML'), (r'ml', 'ML'), (r'data\s?science', 'Data Science'),
+        (r'микросервис\w*', 'Микросервисы'), (r'microservice', 'Микросервисы'),
+        (r'облачн\w*', 'Облачные технологии'), (r'cloud', 'Облачные технологии'),
+        (r'aws', 'AWS'), (r'azure', 'Azure'), (r'gcp', 'GCP'),
+        (r'docker', 'Docker'), (r'kubernetes', 'Kubernetes'), (r'k8s', 'Kubernetes'),
         # Опыт
-        r'опыт\w* работ\w*', r'опыт от \d',
-        r'высшее образовани\w*',
-        r'техническ\w* образовани\w*',
+        (r'опыт\w* работ\w*', 'Опыт работы'), (r'опыт от (\d)', 'Опыт от {} лет'),
+        (r'высшее образовани\w*', 'Высшее образование'),
+        (r'техническ\w* образовани\w*', 'Техническое образование'),
     ]
     
     description_lower = description.lower()
     
-    for keyword in keywords:
-        if re.search(keyword, description_lower, re.IGNORECASE):
-            # Нормализуем найденное слово
-            match = re.search(keyword, description_lower, re.IGNORECASE)
-            if match:
-                found = match.group(0).strip()
-                requirements.append(found.upper() if len(found) <= 4 else found.title())
+    for pattern, label in keywords:
+        match = re.search(pattern, description_lower, re.IGNORECASE)
+        if match:
+            requirements.append(label.format(*match.groups()))
     
-    return requirements
+    return list(dict.fromkeys(requirements))
+
+def extract_description(vacancy_details):
+    """Разбирает описание вакансии: требования, формат работы, уровень кодинга"""
+    description = clean_html(vacancy_details.get('description', ''))
+    return {
+        'requirements': extract_requirements(description),
+        'work_format': check_hybrid_remote(vacancy_details),
+        'coding_level': extract_coding_level(description),
+        'signature': signature_list(description),
+    }
+
+# Сменилась версия - разбор из кэша пересчитывается
+EXTRACT_VERSION = extractor_version(extract_description, check_hybrid_remote, signature_list)
 
 def extract_key_skills(vacancy_details):
     """Извлекает ключевые навыки из API ответа"""
     skills = []
     if vacancy_details and 'key_skills' in vacancy_details:
-        skills = [skill['name'] for skill in vacancy_details['key_skills']]
+        skills = canonicalize_skills(skill['name'] for skill in vacancy_details['key_skills'])
     return skills
 
-def analyze_vacancies(vacancies, max_details=200):
-    """Анализирует вакансии и собирает статистику по требованиям"""
+def analyze_vacancies(vacancies, max_details=200, tracker=None, exporter=None, dedup=None):
+    """
+    Анализирует вакансии и собирает статистику по требованиям
+    tracker - PrecisionTracker: остановиться раньше max_details, когда доли топ-навыков стабильны
+    exporter - VacancyExporter: построчная выгрузка каждой вакансии
+    dedup - DuplicateFilter: перепосты одной и той же вакансии учитываются один раз
+    """
     all_skills = []
     all_requirements = []
+    vacancy_skills = []
     salary_data = []
     experience_data = []
+    processed = 0
+    duplicates = 0
     
     print(f"\nАнализируем детали вакансий (до {max_details} шт.)...")
     
@@ -151,17 +201,31 @@ def analyze_vacancies(vacancies, max_details=200):
         if i % 20 == 0:
             print(f"Обработано: {i}/{min(len(vacancies), max_details)}")
         
+        # Карточка совпадает с уже учтённой - детали не загружаем
+        if dedup and dedup.is_listing_duplicate(vacancy):
+            continue
+        
         # Получаем детальную информацию
         details = get_vacancy_details(vacancy['id'])
+        processed += 1
         
         if details:
+            # Разбор описания берётся из кэша, пока вакансия не изменилась
+            extracted = cached_extract(vacancy['id'], 'system', lambda: extract_description(details), EXTRACT_VERSION)
+            
+            # Почти такое же описание уже учтено
+            if dedup and dedup.is_duplicate(vacancy['id'], extracted.get('signature')):
+                duplicates += 1
+                time.sleep(0.1)
+                continue
+            
             # Ключевые навыки из API
             skills = extract_key_skills(details)
             all_skills.extend(skills)
+            vacancy_skills.append(skills)
             
             # Требования из описания
-            description = clean_html(details.get('description', ''))
-            requirements = extract_requirements(description)
+            requirements = extracted['requirements']
             all_requirements.extend(requirements)
             
             # Зарплата
@@ -177,6 +241,17 @@ def analyze_vacancies(vacancies, max_details=200):
             exp = details.get('experience', {}).get('name')
             if exp:
                 experience_data.append(exp)
+            
+            if exporter:
+                exporter.write(vacancy_row(
+                    "system_analyst", vacancy, details, requirements, skills,
+                    work_format=extracted['work_format'],
+                    coding_level=extracted['coding_level']
+                ))
+            
+            # Достаточно ли уже точности
+            if tracker and tracker.add(skills=skills):
+                break
         
         time.sleep(0.1)  # Пауза между запросами
     
@@ -185,7 +260,10 @@ def analyze_vacancies(vacancies, max_details=200):
         'requirements': Counter(all_requirements),
         'salary': salary_data,
         'experience': Counter(experience_data),
-        'total_analyzed': min(len(vacancies), max_details)
+        'vacancy_skills': vacancy_skills,
+        'confidence': tracker.report() if tracker else None,
+        'duplicates': dedup.summary() if dedup else None,
+        'total_analyzed': processed - duplicates
     }
 
 def print_results(analysis):
@@ -196,6 +274,16 @@ def print_results(analysis):
     
     print(f"\nПроанализировано вакансий: {analysis['total_analyzed']}")
     
+    if analysis.get('duplicates'):
+        d = analysis['duplicates']
+        print(f"Дубли (перепосты): {d['duplicates']} в {d['clusters']} кластерах, "
+              f"не загружено по карточке: {d['skipped_before_fetch']}")
+    
+    if analysis.get('confidence'):
+        print("\n95% доверительные интервалы долей топ-навыков (%):")
+        for name, ci in analysis['confidence'].items():
+            print(f"  {name:40} | {ci['estimate']:>5} [{ci['low']} - {ci['high']}]")
+    
     # Ключевые навыки (из API HeadHunter)
     print("\n" + "-"*60)
     print("КЛЮЧЕВЫЕ НАВЫКИ (из тегов HH, топ-30):")
@@ -252,6 +340,9 @@ def save_results(analysis, filename="hh_analysis_results.json"):
         json.dump(results, f, ensure_ascii=False, indent=2)
     
     print(f"\nРезультаты сохранены в {filename}")
+    
+    # Какие навыки требуют вместе
+    save_cooccurrence(analysis['vacancy_skills'], cooccurrence_filename(filename))
 
 def main():
     print("HeadHunter Vacancy Analyzer")
@@ -269,14 +360,25 @@ def main():
         print("Вакансии не найдены!")
         return
     
-    # Анализируем
-    analysis = analyze_vacancies(vacancies, max_details=200)
+    # Анализируем (с построчной выгрузкой вакансий)
+    with VacancyExporter("hh_system_analyst_vacancies") as exporter:
+        if ADAPTIVE_SAMPLING:
+            analysis = analyze_vacancies(sample_order(vacancies), max_details=200,
+                                         tracker=PrecisionTracker(), exporter=exporter,
+                                         dedup=DuplicateFilter())
+        else:
+            analysis = analyze_vacancies(vacancies, max_details=200, exporter=exporter,
+                                         dedup=DuplicateFilter())
     
     # Выводим результаты
+    print_stats()
     print_results(analysis)
     
     # Сохраняем
     save_results(analysis)
+    
+    # Дописываем снимок в историю и показываем тренды
+    print_trends(append_snapshot("system_analyst", analysis))
 
 if __name__ == "__main__":
     main()
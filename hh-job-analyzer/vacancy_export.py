@@ -0,0 +1,132 @@
+"""
+HeadHunter Vacancy Export
+Построчная выгрузка проанализированных вакансий (одна строка - одна вакансия)
+в колоночный формат: Parquet (zstd) если установлен pyarrow, иначе CSV.gz
+"""
+
+import csv
+import gzip
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+BATCH_SIZE = 200            # CSV: строк в одной порции записи - на диск попадает по ходу обхода
+ROW_GROUP_SIZE = 64 * 1024  # Parquet: строк в одной row group (мелкие группы раздувают файл и замедляют чтение)
+
+COLUMNS = [
+    'dataset', 'vacancy_id', 'name', 'employer_id', 'published_at',
+    'salary_from', 'salary_to', 'currency',
+    'experience', 'schedule', 'work_format', 'coding_level',
+    'requirements', 'skills',
+]
+
+LIST_COLUMNS = {'requirements', 'skills'}
+
+if pa is not None:
+    SCHEMA = pa.schema([
+        ('dataset', pa.dictionary(pa.int16(), pa.string())),
+        ('vacancy_id', pa.string()),
+        ('name', pa.string()),
+        ('employer_id', pa.string()),
+        ('published_at', pa.string()),
+        ('salary_from', pa.int64()),
+        ('salary_to', pa.int64()),
+        ('currency', pa.dictionary(pa.int8(), pa.string())),
+        ('experience', pa.dictionary(pa.int8(), pa.string())),
+        ('schedule', pa.dictionary(pa.int8(), pa.string())),
+        ('work_format', pa.dictionary(pa.int8(), pa.string())),
+        ('coding_level', pa.int8()),
+        ('requirements', pa.list_(pa.string())),
+        ('skills', pa.list_(pa.string())),
+    ])
+
+
+def vacancy_row(dataset, vacancy, details, requirements=(), skills=(), work_format=None, coding_level=None):
+    """Собирает строку выгрузки из вакансии поиска и её деталей"""
+    salary = details.get('salary') or {}
+    return {
+        'dataset': dataset,
+        'vacancy_id': str(vacancy['id']),
+        'name': details.get('name') or vacancy.get('name'),
+        'employer_id': (vacancy.get('employer') or {}).get('id'),
+        'published_at': vacancy.get('published_at'),
+        'salary_from': salary.get('from'),
+        'salary_to': salary.get('to'),
+        'currency': salary.get('currency'),
+        'experience': (details.get('experience') or {}).get('id'),
+        'schedule': (details.get('schedule') or {}).get('id'),
+        'work_format': work_format,
+        'coding_level': coding_level,
+        'requirements': list(requirements),
+        'skills': list(skills),
+    }
+
+
+class VacancyExporter:
+    """
+    Потоковая запись строк: в памяти держится не больше BATCH_SIZE строк для CSV
+    и ROW_GROUP_SIZE для Parquet (row group пишется целиком; остаток - при close, в том числе при ошибке).
+    Использование:
+        with VacancyExporter("hh_vacancies") as exporter:
+            exporter.write(vacancy_row(...))
+    или exporter = VacancyExporter(...).open() ... exporter.close()
+    """
+
+    def __init__(self, basename, batch_size=BATCH_SIZE, force_csv=False, row_group_size=ROW_GROUP_SIZE):
+        self.use_parquet = pa is not None and not force_csv
+        self.path = basename + ('.parquet' if self.use_parquet else '.csv.gz')
+        self.batch_size = row_group_size if self.use_parquet else batch_size
+        self.buffer = []
+        self.rows = 0
+        self.writer = None
+        self.file = None
+
+    def open(self):
+        if self.use_parquet:
+            self.writer = pq.ParquetWriter(self.path, SCHEMA, compression='zstd')
+        else:
+            self.file = gzip.open(self.path, 'wt', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(COLUMNS)
+        return self
+
+    def write(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+
+        if self.use_parquet:
+            columns = {name: [row[name] for row in self.buffer] for name in COLUMNS}
+            self.writer.write_table(pa.Table.from_pydict(columns, schema=SCHEMA), row_group_size=self.batch_size)
+        else:
+            for row in self.buffer:
+                self.writer.writerow(
+                    '|'.join(row[name]) if name in LIST_COLUMNS else row[name]
+                    for name in COLUMNS
+                )
+
+        self.rows += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.use_parquet:
+            self.writer.close()
+        else:
+            self.file.close()
+        print(f"Выгружено вакансий: {self.rows} -> {self.path}")
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
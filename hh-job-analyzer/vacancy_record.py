@@ -0,0 +1,111 @@
+"""
+HeadHunter Lean Vacancy Record
+Компактная запись вакансии: из ответа /vacancies/{id} сохраняются только поля,
+которые читают анализаторы. Для разбора используется orjson, если он установлен
+"""
+
+import json
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Поля, которые читают analyze_vacancies, analyze_role, check_hybrid_remote и выгрузка
+FIELDS = ('id', 'name', 'description', 'key_skills', 'salary', 'experience', 'schedule')
+
+
+def loads(data):
+    """Быстрый разбор JSON (orjson) с откатом на стандартный json"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class VacancyRecord:
+    """
+    Проекция вакансии на FIELDS. Вложенные объекты хранятся кортежами, повторяющиеся
+    строки (навыки, опыт, график) интернируются. Для совместимости с кодом, который
+    работает со словарём ответа API, поддерживает get(), [] и in
+    """
+
+    __slots__ = FIELDS
+
+    @classmethod
+    def from_api(cls, data):
+        """Из полного ответа API (dict)"""
+        record = cls()
+        record.id = data.get('id')
+        record.name = data.get('name')
+        record.description = data.get('description') or ''
+        record.key_skills = tuple(_intern(s['name']) for s in data.get('key_skills') or ())
+
+        salary = data.get('salary')
+        record.salary = (salary.get('from'), salary.get('to'), _intern(salary.get('currency'))) if salary else None
+
+        for field in ('experience', 'schedule'):
+            value = data.get(field)
+            setattr(record, field, (_intern(value.get('id')), _intern(value.get('name'))) if value else None)
+        return record
+
+    @classmethod
+    def from_tuple(cls, values):
+        """Из сохранённого вида (to_tuple)"""
+        record = cls()
+        record.id, record.name, record.description, key_skills, salary, experience, schedule = values
+        record.key_skills = tuple(_intern(s) for s in key_skills)
+        record.salary = tuple(salary) if salary else None
+        record.experience = tuple(_intern(v) for v in experience) if experience else None
+        record.schedule = tuple(_intern(v) for v in schedule) if schedule else None
+        return record
+
+    def to_tuple(self):
+        return tuple(getattr(self, field) for field in FIELDS)
+
+    def get(self, key, default=None):
+        """Значение в форме ответа API (вложенные объекты собираются по запросу)"""
+        if key not in FIELDS:
+            return default
+        value = getattr(self, key)
+        if value is None:
+            return default
+
+        if key == 'key_skills':
+            return [{'name': name} for name in value]
+        if key == 'salary':
+            return {'from': value[0], 'to': value[1], 'currency': value[2]}
+        if key in ('experience', 'schedule'):
+            return {'id': value[0], 'name': value[1]}
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return key in FIELDS and getattr(self, key) is not None
+
+
+def decode_vacancy(content):
+    """Байты ответа /vacancies/{id} -> VacancyRecord"""
+    return VacancyRecord.from_api(loads(content))
+
+
+def dumps_record(record):
+    """Сохраняемый вид записи (компактный JSON-массив)"""
+    return json.dumps(record.to_tuple(), ensure_ascii=False, separators=(',', ':'))
+
+
+def loads_record(text):
+    """Обратно из dumps_record; старые записи кэша (полный ответ API) проецируются"""
+    data = loads(text)
+    if isinstance(data, dict):
+        return VacancyRecord.from_api(data)
+    return VacancyRecord.from_tuple(data)
@@ -0,0 +1,270 @@
+"""
+HeadHunter Vacancy Watcher
+Режим сервиса: опрашивает новые вакансии и обновляет агрегаты на лету,
+текущие результаты доступны по локальному HTTP/JSON
+"""
+
+import json
+import sys
+import threading
+import time
+from bisect import insort
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from hh_pagination import fetch_all_pages
+from intp_career_analyzer import (
+    API_URL,
+    ROLES,
+    calculate_intp_score,
+    check_hybrid_remote,
+    check_no_experience,
+    clean_html,
+    extract_coding_level,
+    get_vacancy_details,
+)
+from skill_aliases import canonicalize_skills
+
+POLL_INTERVAL = 300  # секунд между циклами опроса
+POLL_PAGES = 2       # первый цикл (курсора ещё нет): только самые свежие страницы
+MAX_POLL_PAGES = 20  # глубина выдачи API (2000 вакансий); глубже - следующим окном date_to
+MAX_FAILURES = 3     # после стольких неудачных загрузок деталей вакансия пропускается
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+def new_aggregate(role):
+    """Пустые агрегаты роли"""
+    return {
+        'role': role,
+        'seen': {},      # id -> published_at обработанных вакансий не старше cursor
+        'cursor': None,  # published_at, до которого все вакансии обработаны без пропусков
+        'failures': Counter(),  # id -> число неудачных загрузок деталей
+        'analyzed': 0,
+        'skills': Counter(),
+        'salary_from': [],  # отсортированный список для квантилей
+        'junior_friendly': 0,
+        'hybrid_remote': 0,
+        'coding_sum': 0,
+        'updated_at': None,
+    }
+
+
+def update_aggregate(agg, details):
+    """Добавляет одну вакансию в агрегаты роли"""
+    agg['analyzed'] += 1
+
+    if 'key_skills' in details:
+        agg['skills'].update(canonicalize_skills(s['name'] for s in details['key_skills']))
+
+    if check_hybrid_remote(details) != "Офис":
+        agg['hybrid_remote'] += 1
+
+    if check_no_experience(details):
+        agg['junior_friendly'] += 1
+
+    agg['coding_sum'] += extract_coding_level(clean_html(details.get('description', '')))
+
+    salary = details.get('salary')
+    if salary and salary.get('from') and salary.get('currency') == 'RUR':
+        insort(agg['salary_from'], salary['from'])
+
+
+def quantile(sorted_values, q):
+    """Квантиль по отсортированному списку (линейная интерполяция)"""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+def aggregate_summary(agg):
+    """Текущая сводка роли: топ навыков, квантили зарплат, INTP score"""
+    analyzed = agg['analyzed']
+    result = {
+        'role': agg['role'],
+        'analyzed': analyzed,
+        'skills': agg['skills'],
+        'salary': [{'from': value} for value in agg['salary_from']],
+        'junior_friendly': agg['junior_friendly'],
+        'hybrid_remote': agg['hybrid_remote'],
+        'avg_coding_level': agg['coding_sum'] / analyzed if analyzed else 0,
+    }
+
+    return {
+        'role': agg['role'],
+        'analyzed': analyzed,
+        'intp_score': calculate_intp_score(result) if analyzed else None,
+        'junior_friendly_pct': agg['junior_friendly'] / analyzed * 100 if analyzed else 0,
+        'hybrid_remote_pct': agg['hybrid_remote'] / analyzed * 100 if analyzed else 0,
+        'coding_level': result['avg_coding_level'],
+        'salary_quantiles': {
+            'p25': quantile(agg['salary_from'], 0.25),
+            'p50': quantile(agg['salary_from'], 0.5),
+            'p75': quantile(agg['salary_from'], 0.75),
+            'count': len(agg['salary_from']),
+        },
+        'top_skills': dict(agg['skills'].most_common(20)),
+        'updated_at': agg['updated_at'],
+    }
+
+
+def fetch_new_vacancies(search_query, area=1, cursor=None):
+    """
+    Вакансии, опубликованные с момента cursor (от новых к старым), постранично до курсора.
+    Выдача API ограничена по глубине (MAX_POLL_PAGES страниц), поэтому дальше окно
+    сдвигается через date_to = самая старая полученная вакансия.
+    Возвращает (вакансии, получена ли выдача целиком); при cursor=None - только POLL_PAGES
+    самых свежих страниц, и это считается целой выдачей
+    """
+    params = {"text": search_query, "area": area, "per_page": 100, "order_by": "publication_time"}
+    if not cursor:
+        vacancies, _ = fetch_all_pages(f"{API_URL}/vacancies", params, POLL_PAGES)
+        return vacancies, True
+
+    params["date_from"] = cursor
+    vacancies = {}
+    while True:
+        items, found = fetch_all_pages(f"{API_URL}/vacancies", params, MAX_POLL_PAGES)
+        before = len(vacancies)
+        for vacancy in items:
+            vacancies.setdefault(vacancy['id'], vacancy)
+
+        received = len({vacancy['id'] for vacancy in items})
+        if received >= found:
+            return list(vacancies.values()), True
+        # Меньше полной глубины - какая-то страница не загрузилась
+        if received < MAX_POLL_PAGES * 100 or len(vacancies) == before:
+            return list(vacancies.values()), False
+        params["date_to"] = items[-1]['published_at']
+
+
+def poll_role(agg, search_query, area=1):
+    """
+    Один цикл опроса роли: новые вакансии с момента cursor,
+    детали загружаются только для ещё не виденных.
+    Курсор сдвигается только по непрерывной цепочке успешно обработанных вакансий:
+    если детали не загрузились, на следующем цикле date_from снова захватит эту вакансию.
+    Если выдача с курсора получена не целиком (не загрузилась страница), курсор
+    не сдвигается вовсе - недополученные вакансии запрашиваются на следующем цикле
+    """
+    vacancies, complete = fetch_new_vacancies(search_query, area, agg['cursor'])
+
+    added = 0
+    # Первый цикл - просто стартовая точка: более старые вакансии не догружаем
+    blocked = agg['cursor'] is not None and not complete
+    # Выдача идёт от новых к старым - обрабатываем от старых к новым
+    for vacancy in reversed(vacancies):
+        published = vacancy.get('published_at')
+
+        if vacancy['id'] not in agg['seen']:
+            details = get_vacancy_details(vacancy['id'])
+            time.sleep(0.1)
+            if not details:
+                agg['failures'][vacancy['id']] += 1
+                if agg['failures'][vacancy['id']] < MAX_FAILURES:
+                    blocked = True
+                    continue
+                # Вакансия, видимо, снята с публикации - больше не держим на ней курсор
+                agg['seen'][vacancy['id']] = published
+            else:
+                agg['seen'][vacancy['id']] = published
+                update_aggregate(agg, details)
+                added += 1
+            agg['failures'].pop(vacancy['id'], None)
+
+        if not blocked and published and (agg['cursor'] is None or published > agg['cursor']):
+            agg['cursor'] = published
+
+    # date_from включает границу, поэтому помним только вакансии не старше курсора
+    if agg['cursor']:
+        agg['seen'] = {vacancy_id: published for vacancy_id, published in agg['seen'].items()
+                       if published and published >= agg['cursor']}
+
+    if added:
+        agg['updated_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    return added
+
+
+def render_payloads(aggregates):
+    """
+    Готовит JSON-ответы заранее, чтобы HTTP-обработчик только отдавал байты.
+    Возвращает новый словарь - он подменяется целиком, без блокировок на чтение
+    """
+    summaries = [aggregate_summary(agg) for agg in aggregates.values()]
+    summaries.sort(key=lambda s: s['intp_score'] or 0, reverse=True)
+
+    encode = lambda data: json.dumps(data, ensure_ascii=False).encode('utf-8')
+    payloads = {'/': encode(summaries)}
+    for summary in summaries:
+        payloads['/' + summary['role']] = encode(summary)
+    return payloads
+
+
+class WatcherHandler(BaseHTTPRequestHandler):
+    """GET / - все роли, GET /<роль> - одна роль"""
+
+    payloads = {'/': b'[]'}
+
+    def do_GET(self):
+        body = self.payloads.get(unquote(self.path.rstrip('/')) or '/')
+        if body is None:
+            self.send_response(404)
+            body = b'{"error": "not found"}'
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host=HOST, port=PORT):
+    """Запускает HTTP-сервер в фоновом потоке"""
+    server = ThreadingHTTPServer((host, port), WatcherHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🌐 Текущие результаты: http://{host}:{port}/")
+    return server
+
+
+def watch(roles=ROLES, interval=POLL_INTERVAL, area=1):
+    """Бесконечный цикл опроса всех ролей"""
+    aggregates = {name: new_aggregate(name) for _, name in roles}
+
+    while True:
+        for search_query, role_name in roles:
+            added = poll_role(aggregates[role_name], search_query, area=area)
+            if added:
+                print(f"  ✓ {role_name}: +{added} новых вакансий "
+                      f"(всего {aggregates[role_name]['analyzed']})")
+                WatcherHandler.payloads = render_payloads(aggregates)
+
+        time.sleep(interval)
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    interval = int(sys.argv[2]) if len(sys.argv) > 2 else POLL_INTERVAL
+
+    print("="*70)
+    print("👀 РЕЖИМ НАБЛЮДЕНИЯ ЗА ВАКАНСИЯМИ")
+    print(f"   Опрос каждые {interval} сек | Ролей: {len(ROLES)}")
+    print("="*70)
+
+    server = start_server(port=port)
+    try:
+        watch(interval=interval)
+    except KeyboardInterrupt:
+        print("\nОстановлено")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()